@@ -0,0 +1,285 @@
+"""Бенчмарки SmartifyTV на заглушке ядра Home Assistant.
+
+Запуск из корня репозитория (нужен установленный пакет homeassistant):
+
+    python -m benchmarks.bench_smartify_tv --tvs 200 --json bench_output.json
+    python -m benchmarks.bench_smartify_tv --direct   # прямая отправка на UDP-заглушку Broadlink
+
+Метрики (ключи JSON стабильны, чтобы сравнивать версии между собой):
+- setup: время добавления сущности и память на один ТВ;
+- power_events: стоимость обработки одного state_changed при N ТВ и фоне чужих датчиков
+  и число записей состояния ТВ после выдержки питания;
+- commands: сквозная задержка set_channel, пачки volume_up и volume_set;
+- code_load: время холодной загрузки файла кодов и повторного обращения в зависимости от размера.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from benchmarks import fake_hass
+from custom_components.smartify_tv import media_player
+from custom_components.smartify_tv.code_store import BroadlinkCodeStore
+from custom_components.smartify_tv.const import (
+    COMMAND_NAMES,
+    CONF_IR_REMOTE,
+    CONF_POWER_ENTITY,
+    DEFAULT_POWER_DWELL,
+    DOMAIN,
+    DATA_STATS,
+)
+from custom_components.smartify_tv.stats import CommandStats
+
+MANIFEST = Path(media_player.__file__).with_name("manifest.json")
+
+# Имитация эфира: время передачи одного IR-кода пультом, сек
+IR_CODE_TIME = 0.07
+# Размер одного IR-кода Broadlink в байтах (до base64)
+CODE_SIZE = 300
+
+
+def _remote_mac(index: int) -> str:
+    return f"34ea3400{index:04x}"
+
+
+def _write_codes_file(path: Path, unique_ids: list[str]) -> int:
+    """Write a Broadlink codes file with all COMMAND_NAMES for each device; return its size."""
+    data = {
+        unique_id: {name: base64.b64encode(os.urandom(CODE_SIZE)).decode() for name in COMMAND_NAMES}
+        for unique_id in unique_ids
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"version": 1, "key": path.name, "data": data}))
+    return path.stat().st_size
+
+
+def _register_remote_service(hass: fake_hass.FakeHass, sent: list[int]) -> None:
+    """Register remote.send_command that takes as long as a real transmission."""
+
+    async def _send_command(data: dict[str, Any]) -> None:
+        commands = data["command"]
+        if isinstance(commands, str):
+            commands = [commands]
+        count = len(commands) * data.get("num_repeats", 1)
+        sent.append(count)
+        await asyncio.sleep(count * IR_CODE_TIME + (count - 1) * data.get("delay_secs", 0.4))
+
+    hass.services.async_register("remote", "send_command", _send_command)
+
+
+async def _setup_tvs(
+    hass: fake_hass.FakeHass, tvs: int, remotes: int, instrumentation: bool
+) -> tuple[list, dict[str, Any]]:
+    """Create TVs spread over remotes and measure setup time and memory."""
+    by_remote: dict[int, list[str]] = {index: [] for index in range(remotes)}
+    for index in range(tvs):
+        by_remote[index % remotes].append(f"{DOMAIN}_bench_{index:05d}")
+    for remote, unique_ids in by_remote.items():
+        entity_id = f"remote.blaster_{remote}"
+        hass.entity_registry.add(entity_id, "broadlink", _remote_mac(remote))
+        hass.states.async_set(entity_id, "on")
+        _write_codes_file(
+            Path(hass.config.path(".storage", f"broadlink_remote_{_remote_mac(remote)}_codes")), unique_ids
+        )
+
+    entities = []
+    setup_times = []
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    for index in range(tvs):
+        power_entity = f"sensor.tv_{index}_power"
+        hass.states.async_set(power_entity, "0.5")
+        entry = hass.config_entries.add(
+            f"entry_{index}",
+            DOMAIN,
+            {
+                "name": f"TV {index}",
+                "unique_id": f"{DOMAIN}_bench_{index:05d}",
+                CONF_POWER_ENTITY: power_entity,
+                CONF_IR_REMOTE: f"remote.blaster_{index % remotes}",
+            },
+        )
+        hass.data[DOMAIN][entry.entry_id] = {DATA_STATS: CommandStats(instrumentation)}
+        entity = media_player.SmartifyTVMediaPlayer(hass, entry)
+        fake_hass.add_entity(hass, entity, f"media_player.tv_{index}")
+        started = time.perf_counter()
+        await entity.async_added_to_hass()
+        setup_times.append(time.perf_counter() - started)
+        entities.append(entity)
+    memory_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return entities, {
+        "tvs": tvs,
+        "remotes": remotes,
+        "setup_ms_mean": statistics.mean(setup_times) * 1000,
+        "setup_ms_max": max(setup_times) * 1000,
+        "memory_kb_per_tv": (memory_after - memory_before) / tvs / 1024,
+    }
+
+
+async def _bench_power_events(hass: fake_hass.FakeHass, tvs: int, sensors: int, events: int) -> dict[str, Any]:
+    """Feed state changes of TV plugs and unrelated sensors; measure cost per event."""
+    rng = random.Random(1)
+    for index in range(sensors):
+        hass.states.async_set(f"sensor.other_{index}", "0")
+    writes_before = sum(count for entity_id, count in hass.states.writes.items() if entity_id.startswith("media_player."))
+    updates = []
+    for _ in range(events):
+        # Каждое пятое событие - от розетки ТВ, остальные - фон остальных датчиков дома
+        if rng.random() < 0.2:
+            updates.append((f"sensor.tv_{rng.randrange(tvs)}_power", f"{rng.uniform(0, 120):.1f}"))
+        else:
+            updates.append((f"sensor.other_{rng.randrange(sensors)}", f"{rng.uniform(0, 100):.1f}"))
+    started = time.perf_counter()
+    for entity_id, value in updates:
+        hass.states.async_set(entity_id, value)
+    elapsed = time.perf_counter() - started
+    # Смены состояния ТВ записываются по таймерам выдержки питания - даём им сработать
+    await asyncio.sleep(DEFAULT_POWER_DWELL + 0.5)
+    writes_after = sum(count for entity_id, count in hass.states.writes.items() if entity_id.startswith("media_player."))
+    return {
+        "events": events,
+        "background_sensors": sensors,
+        "us_per_event": elapsed / events * 1e6,
+        "tv_state_writes": writes_after - writes_before,
+    }
+
+
+async def _timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+async def _bench_commands(entity, sent: list[int], rounds: int) -> dict[str, Any]:
+    """Measure end-to-end latency of channel and volume paths on one TV."""
+    # Дальние переходы набираются цифрами, соседние - одним CHANNEL_UP
+    channel = [await _timed(entity.async_set_channel(456 if index % 2 else 123)) for index in range(rounds)]
+    neighbour = [await _timed(entity.async_set_channel(200 + index)) for index in range(rounds + 1)][1:]
+    sent.clear()
+    volume_burst = []
+    for _ in range(rounds):
+        volume_burst.append(await _timed(asyncio.gather(*(entity.async_volume_up() for _ in range(10)))))
+    burst_transmissions = len(sent) / rounds
+    volume_set = []
+    for round_index in range(rounds):
+        volume_set.append(await _timed(entity.async_set_volume_level(0.3 if round_index % 2 else 0.7)))
+    return {
+        "set_channel_3_digits_ms": statistics.median(channel) * 1000,
+        "set_channel_neighbour_ms": statistics.median(neighbour) * 1000,
+        "volume_up_x10_ms": statistics.median(volume_burst) * 1000,
+        "volume_up_x10_transmissions": burst_transmissions,
+        "volume_set_ms": statistics.median(volume_set) * 1000,
+    }
+
+
+async def _bench_code_load(hass: fake_hass.FakeHass, device_counts: list[int]) -> list[dict[str, Any]]:
+    """Measure cold and cached code table loading against the codes file size."""
+    results = []
+    for devices in device_counts:
+        path = Path(hass.config.path(".storage", f"bench_codes_{devices}"))
+        unique_ids = [f"{DOMAIN}_load_{index:05d}" for index in range(devices)]
+        size = _write_codes_file(path, unique_ids)
+        # Хранилище берёт из файла коды всех ТВ интеграции за одно чтение - как в HA, у каждого
+        # устройства в файле есть своя запись SmartifyTV
+        for unique_id in unique_ids:
+            hass.config_entries.add(f"entry_{unique_id}", DOMAIN, {"unique_id": unique_id})
+        store = BroadlinkCodeStore(hass)
+        cold = await _timed(store.async_get_command_table(path, unique_ids[0]))
+        started = time.perf_counter()
+        for unique_id in unique_ids:
+            await store.async_get_command_table(path, unique_id)
+        warm = (time.perf_counter() - started) / devices
+        results.append({
+            "devices": devices,
+            "file_kb": size / 1024,
+            "cold_ms": cold * 1000,
+            "per_device_ms": warm * 1000,
+        })
+    return results
+
+
+async def _use_direct_transport(hass: fake_hass.FakeHass, entity) -> Any:
+    """Point the entity at a local UDP stand-in of the Broadlink blaster."""
+    from benchmarks.fake_broadlink import FakeBroadlinkDevice
+    from custom_components.smartify_tv.transport import BroadlinkTransport
+
+    device = FakeBroadlinkDevice(response_delay=IR_CODE_TIME)
+    host = await device.async_start()
+    entity._transport = BroadlinkTransport(hass, host, device.mac, device.devtype)
+    return device
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    fake_hass.install()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = fake_hass.FakeHass(config_dir)
+        sent: list[int] = []
+        _register_remote_service(hass, sent)
+        entities, setup = await _setup_tvs(hass, args.tvs, args.remotes, args.instrumentation)
+        power_events = await _bench_power_events(hass, args.tvs, args.sensors, args.events)
+        device = await _use_direct_transport(hass, entities[0]) if args.direct else None
+        try:
+            commands = await _bench_commands(entities[0], sent, args.rounds)
+        finally:
+            if device is not None:
+                device.close()
+        code_load = await _bench_code_load(hass, [1, 10, 50, 200])
+        # Отменяем таймеры выдержки питания, запущенные командами бенчмарка
+        for entity in entities:
+            entity._cancel_power_dwell()
+    return {
+        "version": json.loads(MANIFEST.read_text())["version"],
+        "python": platform.python_version(),
+        "params": vars(args),
+        "setup": setup,
+        "power_events": power_events,
+        "commands": commands,
+        "code_load": code_load,
+    }
+
+
+def _print(results: dict[str, Any]) -> None:
+    print(f"SmartifyTV {results['version']} (Python {results['python']})")
+    for section in ("setup", "power_events", "commands"):
+        print(f"\n[{section}]")
+        for key, value in results[section].items():
+            print(f"  {key:32} {value:.3f}" if isinstance(value, float) else f"  {key:32} {value}")
+    print("\n[code_load]")
+    for row in results["code_load"]:
+        print(
+            f"  {row['devices']:5d} devices  {row['file_kb']:9.1f} KB  "
+            f"cold {row['cold_ms']:8.2f} ms  cached {row['per_device_ms']:.4f} ms/device"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tvs", type=int, default=200, help="number of TV entities")
+    parser.add_argument("--remotes", type=int, default=20, help="number of IR blasters shared by the TVs")
+    parser.add_argument("--sensors", type=int, default=500, help="unrelated sensors producing state changes")
+    parser.add_argument("--events", type=int, default=20000, help="state changes to feed")
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions of each command benchmark")
+    parser.add_argument("--direct", action="store_true", help="send via the direct transport to a UDP stand-in")
+    parser.add_argument("--instrumentation", action="store_true", help="enable per-TV command statistics")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args()
+    results = asyncio.run(_run(args))
+    _print(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
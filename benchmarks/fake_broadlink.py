@@ -0,0 +1,139 @@
+"""Локальная UDP-заглушка IR-пульта Broadlink для тестов и бенчмарков без железа.
+
+Реализует ту часть протокола Broadlink, которой пользуется прямая отправка
+SmartifyTV: авторизацию (0x65) и команду send_data (0x6A) пульта RM mini.
+Принятые IR-пакеты сохраняются вместе со временем приёма.
+
+    device = FakeBroadlinkDevice()
+    host = await device.async_start()
+    transport = BroadlinkTransport(hass, host, device.mac, device.devtype)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import time
+
+_MAGIC = bytes.fromhex("5aa5aa555aa5aa55")
+_INIT_KEY = bytes.fromhex("097628343fe99e23765c1513accf8b02")
+_INIT_VECT = bytes.fromhex("562e17996d093d28ddb3ba695a2e6f58")
+
+# Тип устройства RM mini 3
+RM_MINI_DEVTYPE = 0x2737
+
+_PACKET_AUTH = 0x65
+_PACKET_COMMAND = 0x6A
+_COMMAND_SEND_DATA = 0x02
+
+
+def _checksum(data: bytes) -> int:
+    """Return the Broadlink checksum of the data."""
+    return sum(data, 0xBEAF) & 0xFFFF
+
+
+class FakeBroadlinkDevice(asyncio.DatagramProtocol):
+    """UDP stand-in for a Broadlink RM mini that records received IR packets."""
+
+    def __init__(
+        self,
+        mac: bytes = bytes.fromhex("34ea34000001"),
+        devtype: int = RM_MINI_DEVTYPE,
+        response_delay: float = 0.0,
+        drop_every: int = 0,
+    ) -> None:
+        """Initialize the device.
+
+        response_delay имитирует время передачи IR-кода, drop_every > 0
+        выбрасывает каждый N-й запрос, чтобы проверить повторы клиента.
+        """
+        # cryptography - зависимость python-broadlink, заглушка нужна только вместе с ней
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        self._cipher = lambda key: Cipher(algorithms.AES(key), modes.CBC(_INIT_VECT))
+        self.mac = mac
+        self.devtype = devtype
+        self.response_delay = response_delay
+        self.drop_every = drop_every
+        self.received: list[tuple[float, bytes]] = []
+        self.auth_count = 0
+        self._key = _INIT_KEY
+        self._session_id = int.from_bytes(os.urandom(4), "little")
+        self._requests = 0
+        self._transport: asyncio.DatagramTransport | None = None
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        """Start listening and return the (host, port) to connect to."""
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(host, port)
+        )
+        return self._transport.get_extra_info("sockname")[:2]
+
+    def close(self) -> None:
+        """Stop listening."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def _encrypt(self, key: bytes, payload: bytes) -> bytes:
+        payload += bytes((16 - len(payload)) % 16)
+        encryptor = self._cipher(key).encryptor()
+        return encryptor.update(payload) + encryptor.finalize()
+
+    def _decrypt(self, key: bytes, payload: bytes) -> bytes:
+        decryptor = self._cipher(key).decryptor()
+        return decryptor.update(payload) + decryptor.finalize()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        """Answer a request from the client."""
+        if len(data) < 0x38 or data[:8] != _MAGIC:
+            return
+        self._requests += 1
+        if self.drop_every and self._requests % self.drop_every == 0:
+            return
+        packet_type = int.from_bytes(data[0x26:0x28], "little")
+        if packet_type == _PACKET_AUTH:
+            # Ответ на авторизацию шифруется начальным ключом, дальше - ключом сессии
+            response_key = _INIT_KEY
+            self._key = os.urandom(16)
+            self.auth_count += 1
+            payload = self._session_id.to_bytes(4, "little") + self._key
+        elif packet_type == _PACKET_COMMAND:
+            response_key = self._key
+            request = self._decrypt(self._key, data[0x38:])
+            (command,) = struct.unpack("<I", request[:4])
+            if command == _COMMAND_SEND_DATA:
+                self.received.append((time.monotonic(), request[4:]))
+            payload = request[:4]
+        else:
+            return
+        response = bytearray(data[:0x38])
+        response[0x20:0x24] = bytes(4)  # контрольная сумма и код ошибки (0 - успех)
+        response += self._encrypt(response_key, payload)
+        response[0x20:0x22] = _checksum(response).to_bytes(2, "little")
+        if self.response_delay:
+            asyncio.get_running_loop().call_later(
+                self.response_delay, self._reply, bytes(response), addr
+            )
+        else:
+            self._reply(bytes(response), addr)
+
+    def _reply(self, response: bytes, addr) -> None:
+        if self._transport is not None:
+            self._transport.sendto(response, addr)
+
+
+async def _main() -> None:
+    """Run the stand-in until interrupted."""
+    device = FakeBroadlinkDevice()
+    host, port = await device.async_start("0.0.0.0", 80 if os.geteuid() == 0 else 8080)
+    print(f"Fake Broadlink RM mini listening on {host}:{port}, mac {device.mac.hex()}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        device.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,210 @@
+"""Лёгкая замена ядра Home Assistant для бенчмарков SmartifyTV.
+
+Даёт ровно то, чем пользуется интеграция: state machine, шину событий с
+индексом по entity_id, реестр сервисов, реестр сущностей и executor.
+Сущности SmartifyTVMediaPlayer создаются напрямую, без платформы; запись
+состояния идёт в FakeStates, чтобы учитывать стоимость сборки атрибутов.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import State
+
+from custom_components import smartify_tv
+from custom_components.smartify_tv import backends, code_store, media_player, transport
+from custom_components.smartify_tv.code_store import BroadlinkCodeStore, ImportedCodeStore
+from custom_components.smartify_tv.const import DOMAIN, DATA_CODE_STORE, DATA_DISPATCHER, DATA_IMPORTED_CODES
+
+
+class FakeBus:
+    """Event bus with per-entity state_changed listeners, like the HA helper."""
+
+    def __init__(self) -> None:
+        self._listeners: dict[str, list[Callable]] = defaultdict(list)
+        self._entity_listeners: dict[str, list[Callable]] = defaultdict(list)
+        self.fired = 0
+
+    def async_listen(self, event_type: str, listener: Callable) -> Callable[[], None]:
+        self._listeners[event_type].append(listener)
+        return lambda: self._listeners[event_type].remove(listener)
+
+    def async_listen_entity(self, entity_id: str, listener: Callable) -> Callable[[], None]:
+        self._entity_listeners[entity_id].append(listener)
+        return lambda: self._entity_listeners[entity_id].remove(listener)
+
+    def async_fire(self, event_type: str, data: dict[str, Any]) -> None:
+        self.fired += 1
+        event = SimpleNamespace(event_type=event_type, data=data)
+        if event_type == EVENT_STATE_CHANGED:
+            for listener in tuple(self._entity_listeners.get(data["entity_id"], ())):
+                listener(event)
+        for listener in tuple(self._listeners.get(event_type, ())):
+            listener(event)
+
+
+class FakeStore:
+    """helpers.storage.Store kept in memory."""
+
+    def __init__(self, hass: Any, version: int, key: str) -> None:
+        self.data: Any = None
+        self.saves = 0
+
+    async def async_load(self) -> Any:
+        return self.data
+
+    async def async_save(self, data: Any) -> None:
+        self.data = data
+        self.saves += 1
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float = 0) -> None:
+        self.data = data_func()
+        self.saves += 1
+
+
+class FakeStates:
+    """State machine that fires state_changed on every set."""
+
+    def __init__(self, bus: FakeBus) -> None:
+        self._bus = bus
+        self._states: dict[str, State] = {}
+        self.writes: dict[str, int] = defaultdict(int)
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def async_set(self, entity_id: str, state: Any, attributes: dict | None = None) -> None:
+        old_state = self._states.get(entity_id)
+        new_state = State(entity_id, str(state), attributes)
+        self._states[entity_id] = new_state
+        self.writes[entity_id] += 1
+        self._bus.async_fire(
+            EVENT_STATE_CHANGED,
+            {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+        )
+
+
+class FakeServices:
+    """Service registry with blocking calls."""
+
+    def __init__(self) -> None:
+        self._services: dict[tuple[str, str], Callable[[dict], Awaitable[Any]]] = {}
+        self.calls = 0
+
+    def async_register(self, domain: str, service: str, handler: Callable[[dict], Awaitable[Any]]) -> None:
+        self._services[(domain, service)] = handler
+
+    def has_service(self, domain: str, service: str) -> bool:
+        return (domain, service) in self._services
+
+    async def async_call(self, domain: str, service: str, data: dict, blocking: bool = False, **kwargs) -> Any:
+        self.calls += 1
+        handler = self._services[(domain, service)]
+        if blocking:
+            return await handler(data)
+        asyncio.get_running_loop().create_task(handler(data))
+        return None
+
+
+class FakeEntityRegistry:
+    """Entity registry holding platform and unique_id of the IR remotes."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, SimpleNamespace] = {}
+
+    def add(self, entity_id: str, platform: str, unique_id: str, config_entry_id: str | None = None) -> None:
+        self._entries[entity_id] = SimpleNamespace(
+            entity_id=entity_id, platform=platform, unique_id=unique_id, config_entry_id=config_entry_id
+        )
+
+    def async_get(self, entity_id: str) -> SimpleNamespace | None:
+        return self._entries.get(entity_id)
+
+
+class FakeConfigEntries:
+    """Config entries lookup used by the direct transport."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, SimpleNamespace] = {}
+
+    def add(self, entry_id: str, domain: str, data: dict, options: dict | None = None) -> SimpleNamespace:
+        entry = self._entries[entry_id] = SimpleNamespace(
+            entry_id=entry_id, domain=domain, title=data.get("name", entry_id), data=data, options=options or {}
+        )
+        return entry
+
+    def async_get_entry(self, entry_id: str) -> SimpleNamespace | None:
+        return self._entries.get(entry_id)
+
+    def async_entries(self, domain: str | None = None) -> list[SimpleNamespace]:
+        return [entry for entry in self._entries.values() if domain is None or entry.domain == domain]
+
+
+class FakeHass:
+    """Minimal hass object for running SmartifyTVMediaPlayer outside Home Assistant."""
+
+    def __init__(self, config_dir: str) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.bus = FakeBus()
+        self.states = FakeStates(self.bus)
+        self.services = FakeServices()
+        self.entity_registry = FakeEntityRegistry()
+        self.config_entries = FakeConfigEntries()
+        self.config = SimpleNamespace(config_dir=config_dir, path=lambda *parts: os.path.join(config_dir, *parts))
+        self.data[DOMAIN] = {}
+        self.data[DOMAIN][DATA_DISPATCHER] = smartify_tv.PowerStateDispatcher(self)
+        self.data[DOMAIN][DATA_CODE_STORE] = BroadlinkCodeStore(self)
+        self.data[DOMAIN][DATA_IMPORTED_CODES] = ImportedCodeStore(self, self.data[DOMAIN][DATA_CODE_STORE].packet_pool)
+
+    def async_add_executor_job(self, target: Callable, *args: Any) -> asyncio.Future:
+        return self.loop.run_in_executor(None, target, *args)
+
+    def async_create_task(self, target: Awaitable) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+
+def _track_state_change_event(hass: FakeHass, entity_ids: str | list[str], action: Callable) -> Callable[[], None]:
+    """Replacement of helpers.event.async_track_state_change_event on the fake bus."""
+    if isinstance(entity_ids, str):
+        entity_ids = [entity_ids]
+    unsubs = [hass.bus.async_listen_entity(entity_id, action) for entity_id in entity_ids]
+    return lambda: [unsub() for unsub in unsubs]
+
+
+def _call_later(hass: FakeHass, delay: float, action: Callable) -> Callable[[], None]:
+    """Replacement of helpers.event.async_call_later."""
+    return hass.loop.call_later(delay, action, None).cancel
+
+
+def install() -> None:
+    """Point the integration's Home Assistant helpers at the fake core."""
+    smartify_tv.async_track_state_change_event = _track_state_change_event
+    media_player.async_call_later = _call_later
+    backends.async_get = lambda hass: hass.entity_registry
+    transport.async_get = lambda hass: hass.entity_registry
+    code_store.Store = FakeStore
+
+
+def add_entity(hass: FakeHass, entity: media_player.SmartifyTVMediaPlayer, entity_id: str) -> None:
+    """Bind an entity to the fake core; state writes go to FakeStates."""
+    entity.hass = hass
+    entity.entity_id = entity_id
+
+    def _write_state() -> None:
+        attributes = dict(entity.state_attributes or {})
+        attributes.update(entity.extra_state_attributes or {})
+        hass.states.async_set(entity_id, entity.state, attributes)
+
+    async def _no_last_data() -> None:
+        # Сохранённого состояния у заглушки нет - сущности стартуют как после первой установки
+        return None
+
+    entity.async_write_ha_state = _write_state
+    entity.async_get_last_extra_data = _no_last_data
@@ -1,47 +1,142 @@
-from __future__ import annotations
-
-import logging
-
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
-
-from .const import DOMAIN, CONF_IR_REMOTE
-
-_LOGGER = logging.getLogger(__name__)
-
-PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER]
-
-async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    """Set up the SmartifyTV component."""
-    hass.data.setdefault(DOMAIN, {})
-    return True
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up SmartifyTV from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
-    
-    # Создаем изменяемую копию данных конфигурации
-    entry_data = dict(entry.data)
-    
-    # Проверяем наличие IR-ресивера в конфигурации
-    ir_remote = entry_data.get(CONF_IR_REMOTE)
-    if ir_remote:
-        entry_data['ir_remote'] = ir_remote
-
-    hass.data[DOMAIN][entry.entry_id] = entry_data
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(update_listener))
-    return True
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-    return unload_ok
-
-async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Update listener."""
-    await hass.config_entries.async_reload(entry.entry_id)
\ No newline at end of file
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.const import Platform
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .code_store import BroadlinkCodeStore, ImportedCodeStore
+from .const import (
+    DOMAIN,
+    CONF_IR_REMOTE,
+    CONF_INSTRUMENTATION,
+    DATA_DISPATCHER,
+    DATA_CODE_STORE,
+    DATA_IMPORTED_CODES,
+    DATA_STATS,
+    DATA_OPTIONS,
+    DATA_ENTITY,
+)
+from .services import async_setup_services
+from .stats import CommandStats
+
+_LOGGER = logging.getLogger(__name__)
+
+PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.SENSOR]
+
+# Пустая секция "smartify_tv:" в configuration.yaml загружает интеграцию ещё до первого ТВ,
+# чтобы сервис provision был доступен на чистой установке
+CONFIG_SCHEMA = vol.Schema({vol.Optional(DOMAIN): vol.Any(None, {})}, extra=vol.ALLOW_EXTRA)
+
+
+class PowerStateDispatcher:
+    """Раздаёт изменения состояния розеток и пультов только тем ТВ, которые их используют."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the dispatcher."""
+        self._hass = hass
+        # entity_id розетки/пульта -> обработчики ТВ, использующих эту сущность
+        self._listeners: dict[str, list[Callable[[Event], None]]] = {}
+        # entity_id -> отписка от state_changed этой сущности
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+
+    @callback
+    def async_subscribe(
+        self, entity_ids: Iterable[str | None], action: Callable[[Event], None]
+    ) -> CALLBACK_TYPE:
+        """Subscribe a TV to state changes of the given entities."""
+        tracked = {entity_id for entity_id in entity_ids if entity_id}
+        for entity_id in tracked:
+            self._listeners.setdefault(entity_id, []).append(action)
+            # Подписываемся на сущность только один раз, сколько бы ТВ её ни использовали
+            if entity_id not in self._unsubs:
+                self._unsubs[entity_id] = async_track_state_change_event(
+                    self._hass, entity_id, self._async_dispatch
+                )
+
+        @callback
+        def _async_unsubscribe() -> None:
+            for entity_id in tracked:
+                listeners = self._listeners.get(entity_id)
+                if not listeners or action not in listeners:
+                    continue
+                listeners.remove(action)
+                # Последний ТВ ушёл - отписываемся от сущности целиком
+                if not listeners:
+                    del self._listeners[entity_id]
+                    self._unsubs.pop(entity_id)()
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Pass the event to every TV using the changed entity."""
+        for action in tuple(self._listeners.get(event.data["entity_id"], ())):
+            action(event)
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the SmartifyTV component."""
+    hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
+    return True
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up SmartifyTV from a config entry."""
+    hass.data.setdefault(DOMAIN, {})
+    # Общий для всех ТВ диспетчер событий розеток и пультов
+    if DATA_DISPATCHER not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_DISPATCHER] = PowerStateDispatcher(hass)
+    # Общий кэш файлов кодов Broadlink
+    if DATA_CODE_STORE not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_CODE_STORE] = BroadlinkCodeStore(hass)
+    # Коды, импортированные из библиотек; пакеты декодируются в общий с кэшем Broadlink пул
+    if DATA_IMPORTED_CODES not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_IMPORTED_CODES] = ImportedCodeStore(
+            hass, hass.data[DOMAIN][DATA_CODE_STORE].packet_pool
+        )
+    
+    # Создаем изменяемую копию данных конфигурации
+    entry_data = dict(entry.data)
+    
+    # Проверяем наличие IR-ресивера в конфигурации
+    ir_remote = entry_data.get(CONF_IR_REMOTE)
+    if ir_remote:
+        entry_data['ir_remote'] = ir_remote
+
+    # Счётчики команд ТВ: общие для media_player и диагностических сенсоров
+    entry_data[DATA_STATS] = CommandStats(entry.options.get(CONF_INSTRUMENTATION, False))
+    entry_data[DATA_OPTIONS] = _reload_options(entry)
+
+    hass.data[DOMAIN][entry.entry_id] = entry_data
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(update_listener))
+    return True
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+    return unload_ok
+
+def _reload_options(entry: ConfigEntry) -> dict:
+    """Return the options whose change requires reloading the entry."""
+    # Инструментирование добавляет или убирает сенсоры - это меняет набор сущностей записи;
+    # всё остальное сущность применяет на ходу
+    return {CONF_INSTRUMENTATION: entry.options.get(CONF_INSTRUMENTATION, False)}
+
+async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed data and options in place, reloading the entry only if needed."""
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    entity = entry_data.get(DATA_ENTITY) if entry_data is not None else None
+    if entity is None or entity.platform is None or entry_data.get(DATA_OPTIONS) != _reload_options(entry):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    await entity.async_update_config()
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""Бэкенды IR-платформ: поиск пульта, загрузка кодов и отправка команд."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_registry import RegistryEntry, async_get
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .code_store import CommandTable
+from .const import DOMAIN, DATA_BACKENDS, DATA_CODE_STORE, DATA_IMPORTED_CODES
+from .transport import BroadlinkTransport, async_get_transport
+
+_LOGGER = logging.getLogger(__name__)
+
+# Платформа пульта в реестре сущностей -> класс бэкенда
+BACKENDS: dict[str, type[IRBackend]] = {}
+
+
+def register_backend(platform: str):
+    """Register a backend class for an IR remote platform."""
+
+    def _register(backend: type[IRBackend]) -> type[IRBackend]:
+        backend.platform = platform
+        BACKENDS[platform] = backend
+        return backend
+
+    return _register
+
+
+class IRBackend:
+    """IR platform without known code storage: commands go through remote services unchecked."""
+
+    platform: str | None = None
+    # Известны ли бэкенду изученные команды (иначе проверять команду перед отправкой нельзя)
+    checks_commands = False
+    # Умеет ли платформа отправлять импортированные коды (пакеты Broadlink)
+    supports_import = False
+
+    def __init__(self, hass: HomeAssistant, remote_entity_id: str, registry_entry: RegistryEntry | None) -> None:
+        """Initialize the backend."""
+        self._hass = hass
+        self.remote_entity_id = remote_entity_id
+        self._registry_entry = registry_entry
+
+    @property
+    def resolved(self) -> bool:
+        """Return whether the remote was found in the entity registry."""
+        return self._registry_entry is not None
+
+    @property
+    def device_id(self) -> str | None:
+        """Return the hardware id of the remote (e.g. MAC), if known."""
+        return None
+
+    @property
+    def source(self) -> str | None:
+        """Return where the learned codes are stored, if known."""
+        return None
+
+    async def async_get_command_table(self, device: str) -> CommandTable | None:
+        """Return the learned commands of a device (a SmartifyTV unique_id)."""
+        return None
+
+    @callback
+    def async_get_transport(self) -> BroadlinkTransport | None:
+        """Return the direct transport of the remote, if the platform has one."""
+        return None
+
+    async def async_send_command(
+        self, device: str, commands: list[str], delay_secs: float, num_repeats: int
+    ) -> None:
+        """Send commands as one transmission through remote.send_command."""
+        # blocking=True возвращает управление только после отправки всей последовательности
+        await self._hass.services.async_call(
+            "remote",
+            "send_command",
+            {
+                "entity_id": self.remote_entity_id,
+                "device": device,
+                "command": commands,
+                "delay_secs": delay_secs,
+                "num_repeats": num_repeats,
+            },
+            blocking=True,
+        )
+
+    async def async_learn_command(self, device: str, command: str) -> None:
+        """Learn a command through remote.learn_command; returns when the remote caught the code."""
+        await self._hass.services.async_call(
+            "remote",
+            "learn_command",
+            {
+                "entity_id": self.remote_entity_id,
+                "device": device,
+                "command": command,
+            },
+            blocking=True,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return diagnostics data."""
+        return {
+            "platform": self.platform,
+            "remote": self.remote_entity_id,
+            "device_id": self.device_id,
+            "source": self.source,
+        }
+
+
+@register_backend("broadlink")
+class BroadlinkBackend(IRBackend):
+    """Broadlink remotes: codes from /config/.storage/broadlink_remote_<mac>_codes."""
+
+    checks_commands = True
+    supports_import = True
+
+    def __init__(self, hass: HomeAssistant, remote_entity_id: str, registry_entry: RegistryEntry | None) -> None:
+        """Initialize the backend."""
+        super().__init__(hass, remote_entity_id, registry_entry)
+        # unique_id сущности пульта Broadlink - его MAC
+        self._mac = registry_entry.unique_id if registry_entry else None
+        # Файла может ещё не быть, если пульт не изучил ни одной команды
+        self._path = hass.config.path(STORAGE_DIR, f"broadlink_remote_{self._mac}_codes")
+        # Файл разбирается один раз на все ТВ и перечитывается только при изменении
+        self._code_store = hass.data[DOMAIN][DATA_CODE_STORE]
+        self._imported_codes = hass.data[DOMAIN][DATA_IMPORTED_CODES]
+
+    @property
+    def device_id(self) -> str | None:
+        """Return the MAC address of the remote."""
+        return self._mac
+
+    @property
+    def source(self) -> str | None:
+        """Return the path of the codes file."""
+        return self._path
+
+    async def async_get_command_table(self, device: str) -> CommandTable | None:
+        """Return the learned commands of a device completed with its imported codes."""
+        return CommandTable.merged(
+            await self._code_store.async_get_command_table(self._path, device),
+            await self._imported_codes.async_get_command_table(device),
+        )
+
+    @callback
+    def async_get_transport(self) -> BroadlinkTransport | None:
+        """Return the direct Broadlink transport."""
+        return async_get_transport(self._hass, self.remote_entity_id)
+
+
+@callback
+def async_get_backend(hass: HomeAssistant, remote_entity_id: str) -> IRBackend:
+    """Return the backend of an IR remote, creating it on first use."""
+    backends: dict[str, IRBackend] = hass.data[DOMAIN].setdefault(DATA_BACKENDS, {})
+    if (backend := backends.get(remote_entity_id)) is not None:
+        return backend
+    registry_entry = async_get(hass).async_get(remote_entity_id)
+    platform = registry_entry.platform.lower() if registry_entry and registry_entry.platform else None
+    backend_class = BACKENDS.get(platform, IRBackend)
+    backend = backend_class(hass, remote_entity_id, registry_entry)
+    if registry_entry is None:
+        # Без записи в реестре платформа неизвестна: коды не проверяются, прямая отправка недоступна
+        _LOGGER.warning(
+            "IR remote %s is not in the entity registry yet, commands are sent unchecked until it appears",
+            remote_entity_id,
+        )
+    elif backend_class is IRBackend:
+        _LOGGER.debug("No IR backend for platform %s of %s, commands are not checked", platform, remote_entity_id)
+        # Платформа известна реестру, но бэкенда для неё нет - сохраняем её имя для атрибутов
+        backend.platform = platform
+    # Сущность пульта ещё не в реестре (не загрузилась) - не кэшируем: ТВ запросит бэкенд
+    # заново, когда пульт появится
+    if registry_entry is not None:
+        backends[remote_entity_id] = backend
+    return backend
@@ -0,0 +1,104 @@
+"""Одновременная отправка команды группе ТВ (сервис smartify_tv.broadcast)."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID, ENTITY_MATCH_ALL, ENTITY_MATCH_NONE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    DOMAIN,
+    DATA_ENTITY,
+    ATTR_ACTION,
+    ATTR_COMMAND,
+    ATTR_CHANNEL_NUMBER,
+    ATTR_MACRO,
+    MAX_CHANNEL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Действие -> (метод сущности, обязательный параметр)
+BROADCAST_ACTIONS: dict[str, tuple[str, str | None]] = {
+    "turn_on": ("async_turn_on", None),
+    "turn_off": ("async_turn_off", None),
+    "send_command": ("async_send_command", ATTR_COMMAND),
+    "set_channel": ("async_set_channel", ATTR_CHANNEL_NUMBER),
+    "run_macro": ("async_run_macro", ATTR_MACRO),
+}
+
+
+def _has_action_argument(data: dict[str, Any]) -> dict[str, Any]:
+    """Check that the argument required by the action is given."""
+    argument = BROADCAST_ACTIONS[data[ATTR_ACTION]][1]
+    if argument is not None and argument not in data:
+        raise vol.Invalid(f"{argument} is required for {data[ATTR_ACTION]}")
+    return data
+
+
+BROADCAST_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            # Явный список или "all": пропущенный entity_id не должен задевать все ТВ
+            vol.Required(ATTR_ENTITY_ID): cv.comp_entity_ids,
+            vol.Required(ATTR_ACTION): vol.In(BROADCAST_ACTIONS),
+            vol.Optional(ATTR_COMMAND): cv.string,
+            vol.Optional(ATTR_CHANNEL_NUMBER): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_CHANNEL)),
+            vol.Optional(ATTR_MACRO): cv.string,
+        }
+    ),
+    _has_action_argument,
+)
+
+
+async def async_broadcast(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
+    """Run one action on many TVs at once; return per-TV results and the total time."""
+    # Сущности ищем по записям интеграции: в hass.data[DOMAIN] лежат и общие объекты (пульты, бэкенды)
+    entities = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        entity = hass.data[DOMAIN].get(entry.entry_id, {}).get(DATA_ENTITY)
+        if entity is not None and entity.entity_id is not None:
+            entities[entity.entity_id] = entity
+    entity_ids = data[ATTR_ENTITY_ID]
+    if entity_ids == ENTITY_MATCH_NONE:
+        # comp_entity_ids оставляет "none" строкой - перебирать её по символам нельзя
+        entities = {}
+    elif entity_ids != ENTITY_MATCH_ALL:
+        missing = [entity_id for entity_id in entity_ids if entity_id not in entities]
+        if missing:
+            raise HomeAssistantError(f"Not SmartifyTV entities: {', '.join(missing)}")
+        entities = {entity_id: entities[entity_id] for entity_id in entity_ids}
+    method, argument = BROADCAST_ACTIONS[data[ATTR_ACTION]]
+    args = (data[argument],) if argument is not None else ()
+
+    async def _async_run(entity) -> dict[str, Any]:
+        started = time.monotonic()
+        try:
+            await getattr(entity, method)(*args)
+        except Exception as err:  # pylint: disable=broad-except
+            # Ошибка одного ТВ не должна прерывать остальные
+            if not isinstance(err, HomeAssistantError):
+                _LOGGER.exception("%s failed on %s", method, entity.entity_id)
+            return {"success": False, "error": str(err), "elapsed": round(time.monotonic() - started, 3)}
+        return {"success": True, "elapsed": round(time.monotonic() - started, 3)}
+
+    # Все ТВ стартуют сразу: ТВ на разных пультах передают параллельно,
+    # а ТВ на одном пульте выстраивает в очередь планировщик этого пульта
+    started = time.monotonic()
+    results = await asyncio.gather(*(_async_run(entity) for entity in entities.values()))
+    elapsed = time.monotonic() - started
+    failed = sum(not result["success"] for result in results)
+    if failed:
+        _LOGGER.warning("%s: %s of %s TVs failed", data[ATTR_ACTION], failed, len(results))
+    return {
+        "elapsed": round(elapsed, 3),
+        "failed": failed,
+        "results": dict(zip(entities, results)),
+    }
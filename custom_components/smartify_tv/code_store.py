@@ -0,0 +1,294 @@
+"""Общий кэш файлов кодов Broadlink для SmartifyTV."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    COMMAND_NAMES,
+    IMPORTED_CODES_STORAGE_KEY,
+    IMPORTED_CODES_STORAGE_VERSION,
+    IMPORTED_CODES_SAVE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Подпись файла: (mtime в наносекундах, размер). По ней решаем, нужно ли перечитывать файл
+FileSignature = tuple[int, int]
+
+
+def _stat_signature(path: str) -> FileSignature | None:
+    """Return the file signature or None if the file does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_codes(path: str, devices: frozenset[str]) -> tuple[FileSignature | None, dict[str, dict[str, Any]]]:
+    """Read a Broadlink codes file and return the codes of the given devices (runs in the executor)."""
+    signature = _stat_signature(path)
+    if signature is None:
+        return None, {}
+    with open(path, encoding="utf-8") as command_file:
+        data = json.load(command_file)
+    # Коды устройств лежат в секции data: {unique_id: {команда: код}}; остальные устройства
+    # пульта (кондиционеры и т.п.) отбрасываем вместе с разобранным файлом
+    section = data.get("data") if isinstance(data, dict) else None
+    if not isinstance(section, dict):
+        return signature, {}
+    return signature, {device: section[device] for device in devices if isinstance(section.get(device), dict)}
+
+
+# Пакет команды: bytes, для переключаемых команд Broadlink - кортеж пакетов
+Packet = bytes | tuple[bytes, ...]
+
+
+class CommandTable:
+    """Pre-decoded IR packets of one device, indexed by command name."""
+
+    __slots__ = ("_packets", "_raw", "_toggles")
+
+    def __init__(
+        self,
+        packets: dict[str, Packet],
+        raw: frozenset[str] = frozenset(),
+        toggles: frozenset[str] = frozenset(),
+    ) -> None:
+        """Initialize the table."""
+        self._packets = packets
+        # Команды, которых нет в хранилище самого пульта (импортированные): сервису пульта
+        # они передаются как код "b64:...", а не по имени
+        self._raw = raw
+        # Команды с переключающим кодом (например, одна кнопка питания на POWER_ON и POWER_OFF)
+        self._toggles = toggles
+
+    @classmethod
+    def merged(cls, learned: CommandTable | None, imported: CommandTable | None) -> CommandTable | None:
+        """Return learned commands completed with imported ones; learned codes win."""
+        if imported is None or not len(imported):
+            return learned
+        packets = dict(imported._packets)
+        if learned is not None:
+            packets.update(learned._packets)
+            raw = frozenset(command for command in imported._packets if command not in learned._packets)
+        else:
+            raw = frozenset(imported._packets)
+        return cls(packets, raw, imported._toggles & raw)
+
+    @classmethod
+    def from_codes(
+        cls, codes: dict[str, Any], pool: dict[str, bytes], toggles: frozenset[str] = frozenset()
+    ) -> CommandTable:
+        """Decode base64 codes once; identical codes share one bytes object from the pool."""
+
+        def _decode(code: str) -> bytes:
+            if (packet := pool.get(code)) is None:
+                packet = pool[code] = base64.b64decode(code)
+            return packet
+
+        packets: dict[str, Packet] = {}
+        # Сначала основные команды пульта в порядке COMMAND_NAMES, затем собственные команды пользователя
+        for command in (*(name for name in COMMAND_NAMES if name in codes), *codes):
+            if command in packets:
+                continue
+            code = codes[command]
+            try:
+                if isinstance(code, str):
+                    packets[command] = _decode(code)
+                elif isinstance(code, list) and all(isinstance(item, str) for item in code):
+                    packets[command] = tuple(_decode(item) for item in code)
+            except (binascii.Error, ValueError):
+                _LOGGER.warning("Invalid IR code for command %s", command)
+        return cls(packets, toggles=frozenset(toggles & packets.keys()))
+
+    def __contains__(self, command: object) -> bool:
+        return command in self._packets
+
+    def __iter__(self):
+        return iter(self._packets)
+
+    def __len__(self) -> int:
+        return len(self._packets)
+
+    def get(self, command: str) -> Packet | None:
+        """Return the packet(s) of a command."""
+        return self._packets.get(command)
+
+    def is_toggle(self, command: str) -> bool:
+        """Return True if the command's code toggles (e.g. one power key for on and off)."""
+        return command in self._toggles
+
+    def service_command(self, command: str) -> str:
+        """Return the command as remote.send_command should receive it."""
+        if command in self._raw:
+            return f"b64:{base64.b64encode(self._packets[command]).decode()}"
+        return command
+
+    def packet(self, command: str) -> bytes | None:
+        """Return the single packet of a command, or None for missing and toggle commands."""
+        packet = self._packets.get(command)
+        return packet if isinstance(packet, bytes) else None
+
+    def as_dict(self) -> dict[str, str | list[str]]:
+        """Return the codes in the Broadlink base64 format."""
+        return {
+            command: (
+                base64.b64encode(packet).decode()
+                if isinstance(packet, bytes)
+                else [base64.b64encode(item).decode() for item in packet]
+            )
+            for command, packet in self._packets.items()
+        }
+
+
+class BroadlinkCodeStore:
+    """Кэш файлов кодов: каждый файл разбирается один раз для всех ТВ на этом пульте."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the code store."""
+        self._hass = hass
+        # Блокировка на файл: одновременный старт многих ТВ приводит к одному чтению
+        self._locks: dict[str, asyncio.Lock] = {}
+        # путь -> unique_id, которые запрашивали коды из этого файла
+        self._devices: dict[str, set[str]] = {}
+        # (путь, unique_id) -> (подпись файла, таблица команд устройства или None, если кодов нет).
+        # Сам файл в памяти не держим: из него остаются только таблицы ТВ
+        self._tables: dict[tuple[str, str], tuple[FileSignature, CommandTable | None]] = {}
+        # base64-код -> декодированный пакет, общий для всех таблиц
+        self.packet_pool: dict[str, bytes] = {}
+
+    async def async_get_command_table(self, path, unique_id: str) -> CommandTable | None:
+        """Return the command table of unique_id, or None if it has no codes."""
+        if path is None:
+            return None
+        path = str(path)
+        self._devices.setdefault(path, set()).add(unique_id)
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            signature = await self._hass.async_add_executor_job(_stat_signature, path)
+            cached = self._tables.get((path, unique_id))
+            if signature is None:
+                self._drop(path)
+                return None
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            try:
+                signature, codes = await self._hass.async_add_executor_job(
+                    _load_codes, path, self._wanted_devices(path)
+                )
+            except (OSError, ValueError) as err:
+                # Файл мог быть пойман в момент записи - отдаём то, что было разобрано ранее
+                _LOGGER.warning("Failed to read Broadlink codes file %s: %s", path, err)
+                return cached[1] if cached is not None else None
+            if signature is None:
+                self._drop(path)
+                return None
+            # Таблицы строятся за одно чтение для всех ТВ этого файла, а не только для запросившего;
+            # "кодов нет" запоминаем только для тех, кто их уже запрашивал
+            for device in self._devices[path] | codes.keys():
+                device_codes = codes.get(device)
+                table = CommandTable.from_codes(device_codes, self.packet_pool) if device_codes is not None else None
+                self._tables[(path, device)] = (signature, table)
+            _LOGGER.debug("Loaded Broadlink codes file %s (%s devices)", path, len(codes))
+            return self._tables[(path, unique_id)][1]
+
+    def _wanted_devices(self, path: str) -> frozenset[str]:
+        """Return the devices to take from the file: those requested and all SmartifyTV TVs."""
+        devices = set(self._devices[path])
+        for entry in self._hass.config_entries.async_entries(DOMAIN):
+            if (unique_id := entry.data.get("unique_id")) is not None:
+                devices.add(unique_id)
+        return frozenset(devices)
+
+    def _drop(self, path: str) -> None:
+        """Forget the tables of a file that no longer exists."""
+        for key in [key for key in self._tables if key[0] == path]:
+            del self._tables[key]
+
+
+class ImportedCodeStore:
+    """Коды, импортированные из библиотек, в хранилище интеграции.
+
+    Одинаковые пакеты хранятся один раз и разделяются всеми ТВ (и в файле, и в памяти).
+    """
+
+    def __init__(self, hass: HomeAssistant, packet_pool: dict[str, bytes]) -> None:
+        """Initialize the store."""
+        self._store = Store(hass, IMPORTED_CODES_STORAGE_VERSION, IMPORTED_CODES_STORAGE_KEY)
+        # id пакета -> base64-код
+        self._payloads: dict[str, str] = {}
+        # unique_id ТВ -> {команда: id пакета}
+        self._devices: dict[str, dict[str, str]] = {}
+        # unique_id ТВ -> команды с переключающим кодом
+        self._toggles: dict[str, list[str]] = {}
+        self._tables: dict[str, CommandTable] = {}
+        self._packet_pool = packet_pool
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _async_ensure_loaded(self) -> None:
+        """Load the stored codes once."""
+        async with self._lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            self._payloads = data.get("payloads", {})
+            self._devices = data.get("devices", {})
+            self._toggles = data.get("toggles", {})
+            self._loaded = True
+
+    async def async_get_command_table(self, unique_id: str) -> CommandTable | None:
+        """Return the imported commands of a TV."""
+        await self._async_ensure_loaded()
+        if (table := self._tables.get(unique_id)) is not None:
+            return table
+        commands = self._devices.get(unique_id)
+        if not commands:
+            return None
+        table = self._tables[unique_id] = CommandTable.from_codes(
+            {command: self._payloads[payload_id] for command, payload_id in commands.items()},
+            self._packet_pool,
+            frozenset(self._toggles.get(unique_id, ())),
+        )
+        return table
+
+    async def async_import(
+        self, unique_id: str, packets: dict[str, bytes], toggles: set[str] | frozenset[str] = frozenset()
+    ) -> CommandTable | None:
+        """Add codes of a TV and schedule one storage write for the whole batch."""
+        await self._async_ensure_loaded()
+        commands = self._devices.setdefault(unique_id, {})
+        for command, packet in packets.items():
+            payload_id = hashlib.sha1(packet).hexdigest()[:16]
+            self._payloads.setdefault(payload_id, base64.b64encode(packet).decode())
+            commands[command] = payload_id
+        # Новый импорт заменяет и пометки переключающих кодов у своих команд
+        device_toggles = {command for command in self._toggles.get(unique_id, ()) if command not in packets}
+        device_toggles.update(toggles)
+        if device_toggles:
+            self._toggles[unique_id] = sorted(device_toggles)
+        else:
+            self._toggles.pop(unique_id, None)
+        self._tables.pop(unique_id, None)
+        # Импорт для многих ТВ подряд сливается в одну запись файла
+        self._store.async_delay_save(self._data_to_save, IMPORTED_CODES_SAVE_DELAY)
+        return await self.async_get_command_table(unique_id)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store, dropping payloads no TV uses any more."""
+        used = {payload_id for commands in self._devices.values() for payload_id in commands.values()}
+        self._payloads = {payload_id: code for payload_id, code in self._payloads.items() if payload_id in used}
+        return {"payloads": self._payloads, "devices": self._devices, "toggles": self._toggles}
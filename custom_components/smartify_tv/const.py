@@ -1,42 +1,141 @@
-"""Константы для интеграции SmartifyTV."""
-DOMAIN = "smartify_tv"
-DEFAULT_NAME = "SmartifyTV"
-
-CONF_POWER_ENTITY = "power_entity"
-CONF_IR_REMOTE = "ir_remote"
-
-# Пауза между нажатиями кнопок на иммитируемом пульте
-INTERCOMMAND_PAUSE = 0.5
-
-# Словарь основных команд пульта ТВ
-COMMAND_NAMES = {
-    "POWER_ON": "",
-    "POWER_OFF": "",
-    "VOLUME_UP": "",
-    "VOLUME_DOWN": "",
-    "MUTE": "",
-    "UNMUTE": "",
-    "CHANNEL_UP": "",
-    "CHANNEL_DOWN": "",
-    "SOURCE": "",
-    "PLAY": "",
-    "STOP": "",
-    "PAUSE": "",
-    "PLAYPAUSE": "",
-    "KEY_0": "",
-    "KEY_1": "",
-    "KEY_2": "",
-    "KEY_3": "",
-    "KEY_4": "",
-    "KEY_5": "",
-    "KEY_6": "",
-    "KEY_7": "",
-    "KEY_8": "",
-    "KEY_9": "",
-    "UP": "",
-    "DOWN": "",
-    "LEFT": "",
-    "RIGHT": "",
-    "OK": "",
-    "EXIT": "",
-}
+"""Константы для интеграции SmartifyTV."""
+DOMAIN = "smartify_tv"
+DEFAULT_NAME = "SmartifyTV"
+
+CONF_POWER_ENTITY = "power_entity"
+CONF_IR_REMOTE = "ir_remote"
+CONF_VOLUME_STEPS = "volume_steps"
+CONF_VOLUME_RESET = "volume_reset"
+CONF_POWER_ON_THRESHOLD = "power_on_threshold"
+CONF_POWER_OFF_THRESHOLD = "power_off_threshold"
+CONF_POWER_DWELL = "power_dwell"
+CONF_DIRECT_TRANSPORT = "direct_transport"
+CONF_INSTRUMENTATION = "instrumentation"
+CONF_CHANNELS = "channels"
+CONF_CHANNEL_DIGIT_TIMEOUT = "channel_digit_timeout"
+CONF_MACROS = "macros"
+
+# Сколько нажатий VOLUME_UP проходит весь диапазон громкости ТВ
+DEFAULT_VOLUME_STEPS = 10
+
+# Пороги мощности (Вт) с гистерезисом: ТВ включён выше порога включения,
+# выключен не выше порога выключения, между ними состояние не меняется
+DEFAULT_POWER_ON_THRESHOLD = 10
+DEFAULT_POWER_OFF_THRESHOLD = 5
+# Сколько секунд новое состояние питания должно продержаться, прежде чем мы его примем
+DEFAULT_POWER_DWELL = 2
+
+# Сколько секунд ТВ ждёт следующую цифру, прежде чем переключиться на набранный канал
+DEFAULT_CHANNEL_DIGIT_TIMEOUT = 2
+# Наибольший номер канала
+MAX_CHANNEL = 999
+
+# Сервисы сущностей и их параметры
+SERVICE_LEARN_COMMAND = "learn_command"
+SERVICE_SEND_COMMAND = "send_command"
+SERVICE_SET_CHANNEL = "set_channel"
+SERVICE_DEFINE_MACRO = "define_macro"
+SERVICE_REMOVE_MACRO = "remove_macro"
+SERVICE_RUN_MACRO = "run_macro"
+SERVICE_LEARN_SESSION = "learn_session"
+SERVICE_IMPORT_CODES = "import_codes"
+# Сервис домена: массовое добавление ТВ
+SERVICE_PROVISION = "provision"
+# Сервис домена: одно действие сразу для группы ТВ
+SERVICE_BROADCAST = "broadcast"
+ATTR_COMMAND = "command"
+ATTR_COMMANDS = "commands"
+ATTR_SKIP_LEARNED = "skip_learned"
+ATTR_CHANNEL_NUMBER = "channel_number"
+ATTR_MACRO = "macro"
+ATTR_STEPS = "steps"
+ATTR_REPEAT = "repeat"
+ATTR_DELAY = "delay"
+ATTR_TVS = "tvs"
+ATTR_ACTION = "action"
+ATTR_FORMAT = "format"
+ATTR_CODES = "codes"
+ATTR_FILE = "file"
+ATTR_MAPPING = "mapping"
+
+# Событие хода обучения пульта в learn_session
+EVENT_LEARN_PROGRESS = f"{DOMAIN}_learn_progress"
+
+# Ключи общих объектов интеграции в hass.data[DOMAIN]
+DATA_DISPATCHER = "dispatcher"
+DATA_CODE_STORE = "code_store"
+DATA_SCHEDULERS = "schedulers"
+DATA_TRANSPORTS = "transports"
+DATA_BACKENDS = "backends"
+DATA_IMPORTED_CODES = "imported_codes"
+# Ключ сущности в данных записи hass.data[DOMAIN][entry_id]
+DATA_ENTITY = "entity"
+DATA_STATS = "stats"
+# Настройки записи, с которыми она загружена (чтобы не перезагружать её из-за одних макросов)
+DATA_OPTIONS = "options"
+
+# Подтверждение включения/выключения по розетке: сколько ждать пересечения порога
+# после отправки POWER_ON/POWER_OFF (сек) и сколько раз повторить команду
+POWER_CONFIRM_TIMEOUT = 5
+POWER_RETRIES = 2
+# Сколько ещё ждать подтверждения без повтора команды: код переключающий или показание уже меняется, сек
+POWER_SLOW_CONFIRM_TIMEOUT = 15
+
+# Пауза между нажатиями кнопок на иммитируемом пульте
+INTERCOMMAND_PAUSE = 0.5
+# Пауза между цифрами номера канала внутри одной передачи
+CHANNEL_DIGIT_PAUSE = 0.3
+# Пауза между повторами CHANNEL_UP/CHANNEL_DOWN внутри одной передачи
+CHANNEL_STEP_PAUSE = 0.3
+# Время передачи одного IR-кода в эфире (для оценки стоимости последовательности кнопок)
+CHANNEL_KEY_TIME = 0.1
+# Окно, в течение которого шаги громкости собираются в одну передачу
+VOLUME_COALESCE_WINDOW = 0.3
+# Пауза между повторами кода громкости внутри одной передачи
+VOLUME_REPEAT_PAUSE = 0.2
+
+# Прямая отправка на Broadlink: таймаут ответа пульта (сек) и число переподключений при ошибке
+DIRECT_TIMEOUT = 5
+DIRECT_RETRIES = 2
+
+# Хранилище кодов, импортированных из библиотек (/config/.storage/smartify_tv_codes)
+IMPORTED_CODES_STORAGE_KEY = f"{DOMAIN}_codes"
+IMPORTED_CODES_STORAGE_VERSION = 1
+# Задержка записи хранилища: импорт для многих ТВ подряд попадает в одну запись, сек
+IMPORTED_CODES_SAVE_DELAY = 1
+# Папка библиотек кодов в папке конфигурации: относительные пути import_codes считаются от неё
+IMPORT_CODES_DIR = DOMAIN
+
+# Словарь основных команд пульта ТВ
+COMMAND_NAMES = {
+    "POWER_ON": "",
+    "POWER_OFF": "",
+    "VOLUME_UP": "",
+    "VOLUME_DOWN": "",
+    "MUTE": "",
+    "UNMUTE": "",
+    "CHANNEL_UP": "",
+    "CHANNEL_DOWN": "",
+    "CHANNEL_RECALL": "",  # Возврат на предыдущий канал
+    "SOURCE": "",
+    "PLAY": "",
+    "STOP": "",
+    "PAUSE": "",
+    "PLAYPAUSE": "",
+    "KEY_0": "",
+    "KEY_1": "",
+    "KEY_2": "",
+    "KEY_3": "",
+    "KEY_4": "",
+    "KEY_5": "",
+    "KEY_6": "",
+    "KEY_7": "",
+    "KEY_8": "",
+    "KEY_9": "",
+    "UP": "",
+    "DOWN": "",
+    "LEFT": "",
+    "RIGHT": "",
+    "OK": "",
+    "EXIT": "",
+}
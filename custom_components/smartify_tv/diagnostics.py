@@ -0,0 +1,27 @@
+"""Diagnostics support for SmartifyTV."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_ENTITY
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+    }
+    # Полные IR-коды доступны только здесь, в состояние сущности они не выгружаются
+    entity = hass.data[DOMAIN].get(entry.entry_id, {}).get(DATA_ENTITY)
+    if entity is not None:
+        diagnostics["entity"] = entity.async_get_diagnostics()
+    return diagnostics
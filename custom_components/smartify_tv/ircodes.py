@@ -0,0 +1,275 @@
+"""Разбор библиотек IR-кодов (Pronto, LIRC, SmartIR) и перевод их в пакеты Broadlink."""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import re
+from typing import Any
+
+# Поддерживаемые форматы библиотек
+FORMAT_PRONTO = "pronto"
+FORMAT_LIRC = "lirc"
+FORMAT_SMARTIR = "smartir"
+LIBRARY_FORMATS = (FORMAT_PRONTO, FORMAT_LIRC, FORMAT_SMARTIR)
+
+# Такт длительностей в пакете Broadlink, мкс (как в python-broadlink)
+BROADLINK_TICK = 32.84
+# Тип пакета Broadlink для IR
+_BROADLINK_IR = 0x26
+# Длительность периода несущей в кодах Pronto на единицу частотного слова, мкс
+_PRONTO_CLOCK = 0.241246
+
+# Имена кнопок из библиотек (строчные, только буквы и цифры, без префикса key) -> COMMAND_NAMES
+_ALIASES = {
+    "on": "POWER_ON",
+    "poweron": "POWER_ON",
+    "off": "POWER_OFF",
+    "poweroff": "POWER_OFF",
+    "volumeup": "VOLUME_UP",
+    "volup": "VOLUME_UP",
+    "volumedown": "VOLUME_DOWN",
+    "voldown": "VOLUME_DOWN",
+    "unmute": "UNMUTE",
+    "channelup": "CHANNEL_UP",
+    "chup": "CHANNEL_UP",
+    "nextchannel": "CHANNEL_UP",
+    "channeldown": "CHANNEL_DOWN",
+    "chdown": "CHANNEL_DOWN",
+    # "Previous channel" на пультах - возврат к прошлому каналу, а не шаг вниз
+    "last": "CHANNEL_RECALL",
+    "recall": "CHANNEL_RECALL",
+    "prevchannel": "CHANNEL_RECALL",
+    "previouschannel": "CHANNEL_RECALL",
+    "source": "SOURCE",
+    "input": "SOURCE",
+    "play": "PLAY",
+    "stop": "STOP",
+    "pause": "PAUSE",
+    "playpause": "PLAYPAUSE",
+    "up": "UP",
+    "down": "DOWN",
+    "left": "LEFT",
+    "right": "RIGHT",
+    "ok": "OK",
+    "enter": "OK",
+    "select": "OK",
+    "exit": "EXIT",
+    **{str(digit): f"KEY_{digit}" for digit in range(10)},
+}
+# Переключаемые кнопки: код занимает обе команды, если отдельных кодов для них в библиотеке нет,
+# и такие команды помечаются как переключающие (повторная отправка возвращает ТВ обратно)
+_TOGGLES = {
+    "power": ("POWER_ON", "POWER_OFF"),
+    "mute": ("MUTE", "UNMUTE"),
+}
+
+
+def pulses_to_broadlink(pulses: list[float]) -> bytes:
+    """Encode pulse/space durations in microseconds as a Broadlink IR packet."""
+    data = bytearray()
+    for pulse in pulses:
+        ticks = min(int(pulse // BROADLINK_TICK), 0xFFFF)
+        if ticks > 0xFF:
+            # Длинные интервалы: 0x00 и длительность в двух байтах (big-endian)
+            data += b"\x00" + ticks.to_bytes(2, "big")
+        else:
+            data.append(ticks)
+    return bytes((_BROADLINK_IR, 0)) + len(data).to_bytes(2, "little") + data
+
+
+def pronto_to_pulses(pronto: str) -> list[float]:
+    """Return pulse/space durations (us) of a learned Pronto hex code; raise ValueError."""
+    if not isinstance(pronto, str):
+        raise ValueError("Pronto code must be a string")
+    words = [int(word, 16) for word in pronto.split()]
+    if len(words) < 6 or words[0] != 0:
+        raise ValueError("only learned (0000) Pronto codes are supported")
+    period = words[1] * _PRONTO_CLOCK
+    once, repeat = words[2] * 2, words[3] * 2
+    if len(words) < 4 + once + repeat:
+        raise ValueError("Pronto code is shorter than its header says")
+    # Однократная часть, а если её нет - повторяемая
+    durations = words[4:4 + once] if once else words[4:4 + repeat]
+    return [duration * period for duration in durations]
+
+
+def normalize_name(name: str) -> str:
+    """Return a command name usable with send_command."""
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def map_commands(
+    codes: dict[str, bytes], mapping: dict[str, str] | None = None
+) -> tuple[dict[str, bytes], set[str]]:
+    """Map library key names onto COMMAND_NAMES; other keys keep a normalized name.
+
+    Returns the packets by command and the commands filled from a toggle key.
+    """
+    mapping = {key.lower(): value for key, value in (mapping or {}).items()}
+    result: dict[str, bytes] = {}
+    toggles: dict[str, bytes] = {}
+    toggle_commands: set[str] = set()
+    for name, packet in codes.items():
+        if (command := mapping.get(name.lower())) is not None:
+            result[command] = packet
+            continue
+        key = re.sub(r"[^a-z0-9]", "", name.lower())
+        if key.startswith("key") and key != "key":
+            key = key[3:]
+        if key in _TOGGLES:
+            toggles[key] = packet
+        command = _ALIASES.get(key)
+        if command is None and key not in _TOGGLES:
+            command = normalize_name(name)
+        if command and command not in result:
+            result[command] = packet
+    for key, packet in toggles.items():
+        for command in _TOGGLES[key]:
+            if command not in result:
+                result[command] = packet
+                toggle_commands.add(command)
+    return result, toggle_commands
+
+
+def _parse_pronto(text: str) -> dict[str, bytes]:
+    """Parse {"NAME": "0000 ..."} JSON or "NAME: 0000 ..." lines."""
+    try:
+        entries = json.loads(text)
+    except ValueError:
+        entries = {}
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            match = re.match(r"^(.+?)\s*[:=]?\s+((?:[0-9a-fA-F]{4}\s*)+)$", line)
+            if match is None:
+                raise ValueError(f"cannot parse Pronto line: {line[:40]}")
+            entries[match.group(1)] = match.group(2)
+    if not isinstance(entries, dict):
+        raise ValueError("Pronto library must map key names to codes")
+    for name, code in entries.items():
+        if not isinstance(code, str):
+            raise ValueError(f"code of {name} must be a string")
+    return {name: pulses_to_broadlink(pronto_to_pulses(code)) for name, code in entries.items()}
+
+
+def _lirc_int(value: str) -> int:
+    """Parse a LIRC number: hex with 0x, otherwise decimal (possibly with leading zeros)."""
+    return int(value, 16) if value.lower().startswith("0x") else int(value)
+
+
+def _lirc_bits(value: int, bits: int, one: list[int], zero: list[int]) -> list[int]:
+    pulses = []
+    for bit in range(bits - 1, -1, -1):
+        pulses += one if value >> bit & 1 else zero
+    return pulses
+
+
+def _parse_lirc(text: str) -> dict[str, bytes]:
+    """Parse the first remote of a lircd.conf: raw codes and space-encoded codes."""
+    params: dict[str, list[str]] = {}
+    codes: dict[str, list[int]] = {}
+    raw_name = None
+    section = None
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        tokens = line.split()
+        keyword = tokens[0].lower()
+        if keyword == "begin":
+            section = tokens[1].lower() if len(tokens) > 1 else None
+            continue
+        if keyword == "end":
+            if [token.lower() for token in tokens[1:2]] == ["remote"] and codes:
+                break
+            section = "remote" if section in ("codes", "raw_codes") else None
+            continue
+        if section == "remote":
+            params[keyword] = tokens[1:]
+        elif section == "codes":
+            if len(tokens) < 2:
+                raise ValueError(f"LIRC code {tokens[0]} has no value")
+            codes[tokens[0]] = _lirc_encode(params, int(tokens[1], 16))
+        elif section == "raw_codes":
+            if keyword == "name":
+                raw_name = tokens[1]
+                codes[raw_name] = []
+            elif raw_name is not None:
+                codes[raw_name] += [int(token) for token in tokens]
+    if not codes:
+        raise ValueError("no codes found in LIRC config")
+    gap = _lirc_int((params.get("gap") or ["0"])[0])
+    result = {}
+    for name, pulses in codes.items():
+        # Последней должна идти пауза, иначе следующий повтор сольётся с кодом
+        if len(pulses) % 2 and gap:
+            pulses = [*pulses, gap]
+        result[name] = pulses_to_broadlink(pulses)
+    return result
+
+
+def _lirc_encode(params: dict[str, list[str]], code: int) -> list[int]:
+    """Encode a code of a space-encoded LIRC remote into pulse/space durations."""
+    flags = {flag.upper() for flag in "".join(params.get("flags", [])).split("|") if flag}
+    if flags - {"SPACE_ENC", "CONST_LENGTH"}:
+        raise ValueError(f"unsupported LIRC encoding: {'|'.join(sorted(flags))}")
+    numbers = {key: [_lirc_int(value) for value in values] for key, values in params.items()
+               if key in ("bits", "header", "one", "zero", "ptrail", "pre_data_bits", "pre_data",
+                          "post_data_bits", "post_data")}
+    one, zero = numbers.get("one"), numbers.get("zero")
+    if not (one and zero and numbers.get("bits")):
+        raise ValueError("LIRC remote has no bits/one/zero definition")
+    pulses = list(numbers.get("header", []))
+    if numbers.get("pre_data_bits"):
+        pulses += _lirc_bits((numbers.get("pre_data") or [0])[0], numbers["pre_data_bits"][0], one, zero)
+    pulses += _lirc_bits(code, numbers["bits"][0], one, zero)
+    if numbers.get("post_data_bits"):
+        pulses += _lirc_bits((numbers.get("post_data") or [0])[0], numbers["post_data_bits"][0], one, zero)
+    pulses += numbers.get("ptrail", [])
+    return pulses
+
+
+def _flatten(commands: dict[str, Any], prefix: str = "") -> dict[str, str]:
+    """Flatten nested SmartIR command groups (e.g. sources) into "group key" names."""
+    flat = {}
+    for name, code in commands.items():
+        if isinstance(code, dict):
+            flat.update(_flatten(code, f"{prefix}{name} "))
+        elif isinstance(code, str):
+            flat[f"{prefix}{name}"] = code
+        else:
+            raise ValueError(f"code of {prefix}{name} must be a string")
+    return flat
+
+
+def _parse_smartir(text: str) -> dict[str, bytes]:
+    """Parse a SmartIR device file with Base64 (Broadlink) or Pronto codes."""
+    data = json.loads(text)
+    if not isinstance(data, dict) or not isinstance(data.get("commands"), dict):
+        raise ValueError("SmartIR file has no commands")
+    encoding = str(data.get("commandsEncoding", "Base64")).lower()
+    commands = _flatten(data["commands"])
+    if encoding == "base64":
+        try:
+            return {name: base64.b64decode(code) for name, code in commands.items()}
+        except binascii.Error as err:
+            raise ValueError(f"invalid Base64 code: {err}") from err
+    if encoding == "pronto":
+        return {name: pulses_to_broadlink(pronto_to_pulses(code)) for name, code in commands.items()}
+    raise ValueError(f"unsupported SmartIR encoding: {data.get('commandsEncoding')}")
+
+
+_PARSERS = {
+    FORMAT_PRONTO: _parse_pronto,
+    FORMAT_LIRC: _parse_lirc,
+    FORMAT_SMARTIR: _parse_smartir,
+}
+
+
+def parse_library(
+    library_format: str, text: str, mapping: dict[str, str] | None = None
+) -> tuple[dict[str, bytes], set[str]]:
+    """Parse a code library into Broadlink packets by command name and toggle commands; raise ValueError."""
+    return map_commands(_PARSERS[library_format](text), mapping)
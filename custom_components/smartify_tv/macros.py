@@ -0,0 +1,74 @@
+"""Макросы: именованные последовательности кнопок, собранные в передачи пульта."""
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+import voluptuous as vol
+
+from homeassistant.helpers import config_validation as cv
+
+from .const import ATTR_COMMAND, ATTR_DELAY, ATTR_REPEAT, INTERCOMMAND_PAUSE
+
+# Шаг макроса: имя команды или словарь с числом повторов и паузой после шага
+MACRO_STEP_SCHEMA = vol.Any(
+    vol.All(cv.string, lambda command: {ATTR_COMMAND: command}),
+    {
+        vol.Required(ATTR_COMMAND): cv.string,
+        vol.Optional(ATTR_REPEAT, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+        vol.Optional(ATTR_DELAY, default=INTERCOMMAND_PAUSE): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+    },
+)
+MACRO_STEPS_SCHEMA = vol.All(cv.ensure_list, vol.Length(min=1), [MACRO_STEP_SCHEMA])
+
+
+class MacroSegment(NamedTuple):
+    """Part of a macro sent as one transmission with a uniform pause between codes."""
+
+    commands: list[str]
+    delay_secs: float
+    num_repeats: int
+    pause_after: float
+
+
+def normalize_steps(steps: list[Any]) -> list[dict[str, Any]]:
+    """Validate steps and return them with repeat and delay filled in; raise vol.Invalid."""
+    normalized = MACRO_STEPS_SCHEMA(steps)
+    return [
+        {
+            ATTR_COMMAND: step[ATTR_COMMAND],
+            ATTR_REPEAT: step.get(ATTR_REPEAT, 1),
+            ATTR_DELAY: step.get(ATTR_DELAY, INTERCOMMAND_PAUSE),
+        }
+        for step in normalized
+    ]
+
+
+def compile_macro(steps: list[dict[str, Any]]) -> list[MacroSegment]:
+    """Compile normalized steps into transmissions.
+
+    Подряд идущие нажатия с одинаковой паузой уходят одной передачей (delay_secs
+    пульта), одна кнопка подряд - через num_repeats; пауза, отличающаяся от
+    соседних, выдерживается между передачами.
+    """
+    presses = [
+        (step[ATTR_COMMAND], step[ATTR_DELAY]) for step in steps for _ in range(step[ATTR_REPEAT])
+    ]
+    segments = []
+    commands = [presses[0][0]]
+    delay = None
+    for (_, pause), (command, _) in zip(presses, presses[1:]):
+        if delay is None or pause == delay:
+            delay = pause
+            commands.append(command)
+        else:
+            segments.append(_segment(commands, delay, pause))
+            commands = [command]
+            delay = None
+    segments.append(_segment(commands, delay, 0.0))
+    return segments
+
+
+def _segment(commands: list[str], delay: float | None, pause_after: float) -> MacroSegment:
+    if len(commands) > 1 and len(set(commands)) == 1:
+        return MacroSegment([commands[0]], delay or 0.0, len(commands), pause_after)
+    return MacroSegment(commands, delay or 0.0, 1, pause_after)
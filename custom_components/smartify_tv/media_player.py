@@ -1,516 +1,1164 @@
-"""SmartifyTV integration."""
-from __future__ import annotations
-
-import logging
-import voluptuous as vol
-import asyncio
-import aiofiles
-import time
-import json
-import os
-import broadlink as blk
-
-from pathlib import Path
-from homeassistant.core import HomeAssistant, ServiceCall, callback
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.entity_registry import async_get
-from homeassistant.components.media_player import (
-    MediaType,
-    MediaPlayerState,
-    MediaPlayerEntity,
-    MediaPlayerDeviceClass,
-    MediaPlayerEntityFeature,
-)
-from homeassistant.const import CONF_NAME, STATE_OFF, STATE_ON, STATE_UNAVAILABLE
-
-from .const import DOMAIN, DEFAULT_NAME, CONF_POWER_ENTITY, CONF_IR_REMOTE, COMMAND_NAMES, INTERCOMMAND_PAUSE
-
-_LOGGER = logging.getLogger(__name__)
-
-# Константа для порогового значения мощности
-POWER_THRESHOLD = 10  # Пороговое значение мощности в ваттах
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
-    """Set up Easy TV media player from a config entry."""
-    async_add_entities([SmartifyTVMediaPlayer(hass, entry)], update_before_add=True)
-
-async def get_entity_info(hass, entity_id):
-    """Возвращает информацию о платформе и unique_id для указанного entity_id из реестра."""
-    # Получаем реестр сущностей
-    entity_registry = async_get(hass)
-    # Получаем запись для указанного entity_id
-    entry = entity_registry.async_get(entity_id)
-    # Если запись найдена, возвращаем платформу и unique_id
-    if entry:
-        return entry.platform, entry.unique_id
-    return None, None
-
-class SmartifyTVMediaPlayer(MediaPlayerEntity):
-    """Representation of an Easy TV media player."""
-
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
-        """Initialize the media player."""
-        self.hass = hass
-        self._state = STATE_OFF
-        self._attr_state = MediaPlayerState.OFF
-        self._config_entry = config_entry
-        self._name = config_entry.data.get("name", DEFAULT_NAME)  # Извлекаем имя из config_entry
-        self._unique_id = config_entry.data.get("unique_id")  # Извлекаем сохраненный unique_id
-        self._power_entity = config_entry.data.get(CONF_POWER_ENTITY)
-        self._ir_remote = config_entry.data.get(CONF_IR_REMOTE)
-        self._ir_remote_known_types = {
-            'broadlink': True,
-        }
-        self._ir_remote_mac = None  # MAC _ir_remote (если хоть одну команду учили)
-        self._ir_remote_platform = None  # Платформа пульта
-        self._ir_remote_cmd_file = None  # Путь к файлу команд _ir_remote (если хоть одну команду учили)
-        self._is_unavailable = False
-        self._is_mute = False  # Атрибут для хранения состояния звука
-        self._volume_level = 0.2  # Начальный уровень громкости (от 0.0 до 1.0) - не учитывается))
-        self._current_channel = 1  # Начальный канал
-        self._last_command_time = 0
-        self._button_aliases = {
-            "0": "KEY_0",
-            "1": "KEY_1",
-            "2": "KEY_2",
-            "3": "KEY_3",
-            "4": "KEY_4",
-            "5": "KEY_5",
-            "6": "KEY_6",
-            "7": "KEY_7",
-            "8": "KEY_8",
-            "9": "KEY_9"
-        }
-        self._learned_commands = None
-        self._learning_locked = False
-        # Подписываемся на изменения состояния
-        # Включение/выключение
-        self.hass.bus.async_listen(
-            "state_changed",
-            self._handle_power_state_change
-        )
-        # начальная настройка, связанная с получением данных используемых физических устройств
-        hass.async_create_task(self.async_initialize())
-
-    async def async_initialize(self):
-        """Асинхронная настройка IR устройства."""
-        platform, unique_id = await get_entity_info(self.hass, self._ir_remote)
-        self._ir_remote_platform = platform.lower()
-        self._ir_remote_mac = unique_id
-        # BROADLINK
-        if self._ir_remote_platform == 'broadlink':
-            self._ir_remote_cmd_file = self._find_broadlink_file_by_mac(self._ir_remote_mac)
-            # Читаем команды. Если файл- ок, будут команды, иначе - None
-            self._learned_commands = await self._read_broadlink_commands(self._ir_remote_cmd_file)
-        else:
-            self._ir_remote_mac = None
-        # Проверяем начальное состояние
-        await self._update_power_state()
-
-    @property
-    def name(self):
-        """Return the name of the device."""
-        return self._name
-
-    @property
-    def state(self):
-        """Return the state of the device."""
-        # return self._state
-        return self._attr_state
-
-    @property
-    def device_class(self):
-        """Return the class of this device."""
-        return MediaPlayerDeviceClass.TV
-
-    @property
-    def icon(self):
-        """Return the icon to use in the frontend."""
-        return "mdi:television-classic"
-
-    @property
-    def supported_features(self):
-        """Flag media player features that are supported."""
-        return (
-            MediaPlayerEntityFeature.TURN_ON |
-            MediaPlayerEntityFeature.TURN_OFF |
-            MediaPlayerEntityFeature.VOLUME_MUTE |
-            MediaPlayerEntityFeature.VOLUME_STEP |
-            MediaPlayerEntityFeature.PREVIOUS_TRACK |
-            MediaPlayerEntityFeature.NEXT_TRACK |
-            MediaPlayerEntityFeature.PLAY_MEDIA |
-            MediaPlayerEntityFeature.PLAY |
-            MediaPlayerEntityFeature.STOP |
-            MediaPlayerEntityFeature.PAUSE
-        )
-
-    @property
-    def unique_id(self):
-        """Return a unique ID for this media player."""
-        return self._unique_id
-
-    @property
-    def extra_state_attributes(self):
-        """Return extra state attributes."""
-        return {
-            "is_unavailable": self._is_unavailable, 
-            "uuid": self._unique_id,
-            "ir_platform": self._ir_remote_platform,
-            "ir_mac": self._ir_remote_mac,
-            "ir_file": self._ir_remote_cmd_file,
-            "ir_cmd": self._learned_commands 
-        }
-
-    @property
-    def is_volume_muted(self):
-        """Return True if volume is muted."""
-        return self._is_mute
-
-    @property
-    def volume_level(self):
-        """Return the volume level of the media player (0.1)."""
-        return self._volume_level
-
-    @property
-    def media_title(self):
-        """Return the current channel."""
-        return f"Channel {self._current_channel}"
-
-    def _find_broadlink_file_by_mac(self, mac_address):
-        """Ищем в /config/.storage файл Broadlink, с указаным MAC-адресом в имени"""
-        # Определяем шаблон
-        filename_mask = f"broadlink_remote_{mac_address}_codes"
-        # Полное имя файла команд Broadlink
-        broadlink_file = Path(__file__).parent.parent.parent / ".storage" / filename_mask
-        if broadlink_file.is_file():
-            return broadlink_file.absolute()
-        return None  # Если файл не найден
-
-    async def _read_broadlink_commands(self, bfile):
-        """Читаем команды Broadlink"""
-        unique_id_key = self._unique_id
-        if bfile and bfile.is_file():
-            async with aiofiles.open(bfile, mode='r') as command_file:
-                file_content = await command_file.read()
-                data = json.loads(file_content)
-                # Ищем запись по UID
-                if isinstance(data, dict) and 'data' in data and isinstance(data['data'], dict):
-                    if unique_id_key in data['data']:
-                        # Переписываем найденные коды
-                        return data['data'][unique_id_key].copy()
-        return None
-
-    async def async_check_command_existence(self, key_to_check):
-        """Асинхронно проверяет наличие ключа в self._learned_commands."""
-        try:
-            # Не проверяем платформу, т.к. команды всех платформ приведены к определённому типу,
-            # но проверяем известность платформы для этой интеграции
-            # (способ отсюда: https://ru.stackoverflow.com/questions/460207/%D0%95%D1%81%D1%82%D1%8C-%D0%BB%D0%B8-%D0%B2-python-%D0%BE%D0%BF%D0%B5%D1%80%D0%B0%D1%82%D0%BE%D1%80-switch-case)
-            if self._ir_remote_known_types[self._ir_remote_platform]:
-                # Если платформа IR известна - проверяем команды
-                if isinstance(self._learned_commands, dict):
-                    # self._learned_commands содержит команды
-                    if key_to_check in self._learned_commands:
-                        # Команда изучена
-                        return True
-                    else:
-                        # Команда не изучена
-                        return False
-                else:
-                    # self._learned_commands == None
-                    return False
-        except KeyError as e:
-            # Если платформа IR не известна - возвращаем True, т.к. мы не умеем работать с этой платформой!
-            return True
-
-    async def async_update(self):
-        """Fetch new state data for the media player."""
-        # Возможно, вам все еще нужно периодическое обновление для других данных
-
-# ===================================================================================
-
-    async def _get_ir_status(self):
-        """Get the IR status."""
-        ir_state = self.hass.states.get(self._ir_remote)
-        if ir_state and ir_state.state not in (None, "unknown", "unavailable"):
-            return ir_state.state
-        else:
-            _LOGGER.warning("IR entity state is unavailable or unknown: %s", ir_state.state if ir_state else "None")
-            return STATE_UNAVAILABLE
-
-    async def _update_power_state(self):
-        """Обновление состояния мощности."""
-        state = self.hass.states.get(self._power_entity)
-        if state is None:
-            self._state = STATE_OFF
-            self._attr_state = MediaPlayerState.OFF
-            self._is_unavailable = True
-            self.async_write_ha_state()
-            return
-        if state.state not in (None, "unknown", "unavailable"):
-            try:
-                power_value = float(state.state)
-                if power_value > POWER_THRESHOLD:
-                    self._state = STATE_ON
-                    self._attr_state = MediaPlayerState.ON
-                else:
-                    self._state = STATE_OFF
-                    self._attr_state = MediaPlayerState.OFF
-            except ValueError:
-                _LOGGER.warning("Invalid power value: %s", state.state)
-                self._state = STATE_OFF
-        else:
-            _LOGGER.warning("Power entity state is unavailable or unknown: %s", state.state)
-            self._state = STATE_OFF
-        # Определяем доступность
-        if state.state in (None, "unknown", "unavailable") or await self._get_ir_status() == STATE_UNAVAILABLE:
-            self._is_unavailable = True
-        else:
-            self._is_unavailable = False
-        self.async_write_ha_state()
-
-    @callback
-    async def _handle_power_state_change(self, event):
-        """Обработчик изменения состояния мощности."""
-        if event.data.get("entity_id") == self._power_entity:
-            await self._update_power_state()
-
-    async def async_turn_on(self):
-        """Turn the media player on."""
-        # Вызов сервиса remote.send_command
-        if self._state == STATE_OFF:
-            try:
-                await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'POWER_ON'}))
-            except ValueError:
-                _LOGGER.warning("POWER_ON error value: %s", power_state.state)
-
-    async def async_turn_off(self):
-        """Turn the media player off."""
-        # Вызов сервиса remote.send_command
-        if self._state == STATE_ON:
-            try:
-                await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'POWER_OFF'}))
-            except ValueError:
-                _LOGGER.warning("POWER_OFF error value: %s", power_state.state)
-
-# ===================================================================================
-
-    async def handle_send_command(self, call: ServiceCall):
-        """Handle the service call to send a command."""
-        command = call.data.get("command")
-        # Проверяем наличие ключа
-        if await self.async_check_command_existence(command):
-            # Вызов сервиса remote.send_command
-            await self.hass.services.async_call(
-                "remote",
-                "send_command",
-                {
-                    "entity_id": self._ir_remote,
-                    "device": self._unique_id,
-                    "command": command,
-                }
-            )
-
-    async def handle_learn_command(self, call: ServiceCall):
-        """Handle the service call to learn a command."""
-        if self._learning_locked:
-            return None
-        command = call.data.get("command")
-        # Вызов сервиса remote.learn_command
-        await self.hass.services.async_call(
-            "remote",
-            "learn_command",
-            {
-                "entity_id": self._ir_remote,
-                "device": self._unique_id,
-                "command": command,
-            }
-        )
-        if self._ir_remote_platform == 'broadlink':
-            self._learning_locked = True
-            # Ждём 35 сек и считываем коды из файла broadlink
-            await asyncio.sleep(35)
-            await self._read_broadlink_commands(self._ir_remote_cmd_file)
-            self._learning_locked = False
-
-#======================================================================================================
-
-    async def ensure_command_pause(self, last_command_time, pause_duration):
-        """Ensure a pause between commands."""
-        current_time = time.time()
-        elapsed_time = current_time - last_command_time
-        # Проверяем, прошло ли pause_duration секунд с момента последнего вызова
-        if elapsed_time < pause_duration:
-            await asyncio.sleep(pause_duration - elapsed_time)
-        return time.time()  # Возвращаем обновлённое время последнего вызова
-
-    async def async_mute_volume(self, mute: bool):
-        """Mute or unmute the volume."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        self._is_mute = mute
-        command = 'MUTE' if mute else 'UNMUTE'
-        try:
-            await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": command}))
-            self.async_write_ha_state()  # Обновляем состояние после изменения
-        except ValueError:
-            _LOGGER.warning("%s error for %s", command, self._name)
-
-    async def async_volume_up(self):
-        """Increase the volume level."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Увеличиваем громкость
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'VOLUME_UP'}))
-        if self._volume_level < 1.0:
-            self._volume_level = min(1.0, self._volume_level + 0.1)
-            self.async_write_ha_state()
-
-    async def async_volume_down(self):
-        """Decrease the volume level."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Уменьшаем громкость
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'VOLUME_DOWN'}))
-        if self._volume_level > 0.0:
-            self._volume_level = max(0.0, self._volume_level - 0.1)
-            self.async_write_ha_state()
-
-    async def async_media_previous_track(self):
-        """Switch to the previous channel."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Отправляем команду для переключения на предыдущий канал
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'CHANNEL_DOWN'}))
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-
-    async def async_media_next_track(self):
-        """Switch to the next channel."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Отправляем команду для переключения на следующий канал
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'CHANNEL_UP'}))
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-
-    async def set_channel(self, call: ServiceCall):
-        """Set the TV to a specific channel."""
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Переключаем канал
-        channel_number = call.data.get('channel_number')
-        if 1 <= channel_number <= 999:
-            self._current_channel = channel_number
-            self.async_write_ha_state()
-            for digit in str(channel_number):
-                command = self._button_aliases[digit]  # Получаем команду из приватного словаря
-                """Вызов функции с текущей командой"""
-                await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": command}))
-                # Пауза в INTERCOMMAND_PAUSE секунды между отправкой каждой команды
-                await asyncio.sleep(INTERCOMMAND_PAUSE)
-
-    async def async_play_media(
-        self, media_type: MediaType | str, media_id: str, **kwargs: Any
-    ) -> None:
-        """ Принимаем номер канала ТВ """
-        if media_type == MediaType.CHANNEL:
-            if not media_id.isnumeric():
-                _LOGGER.warning("Channel must be numeric:  %s", media_id)
-                return
-            await self.set_channel(ServiceCall(self.hass,domain=None, service=None, data={"channel_number": int(media_id)}))
-            return
-
-        if media_type in [MediaType.URL, MediaType.APP]:
-            return
-
-        _LOGGER.warning("Invalid media type:  %s", media_type)
-
-    async def async_media_play(self) -> None:
-        """Send play command to media player."""
-				# Проверяем состояние, если выключен - выход
-        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
-        if self._state == STATE_OFF:
-            return
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Отправляем команду для начала/возобновления проигрывания
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'PLAY'}))
-        # Set status
-        self._attr_state = MediaPlayerState.PLAYING
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-
-    async def async_media_play_pause(self) -> None:
-        """Send pause command to media player."""
-				# Проверяем состояние, если выключен - выход
-        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
-        if self._state == STATE_OFF:
-            return
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        new_command = 'PAUSE' if self._attr_state == MediaPlayerState.PLAYING else 'PLAY'
-        # Отправляем команду для приостановки воспроизведения
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": new_command}))
-        # Set status
-        if self._attr_state == MediaPlayerState.PLAYING:
-            self._attr_state = MediaPlayerState.PAUSED
-        else:
-            self._attr_state = MediaPlayerState.PLAYING
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-        _LOGGER.warning("Calling media_play_pause")
-
-    async def async_media_pause(self) -> None:
-        """Send pause command to media player."""
-				# Проверяем состояние, если выключен - выход
-        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
-        if self._state == STATE_OFF:
-            return
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Отправляем команду для приостановки воспроизведения
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'PAUSE'}))
-        # Set status
-        self._attr_state = MediaPlayerState.PAUSED
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-
-    async def async_media_stop(self) -> None:
-        """Send stop command to media player."""
-				# Проверяем состояние, если выключен - выход
-        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
-        if self._state == STATE_OFF:
-            return
-        # Ожидаем окончание выполнения предыдущей команды, если она была
-        self._last_command_time = await self.ensure_command_pause(self._last_command_time, INTERCOMMAND_PAUSE)
-        # Отправляем команду для остановки воспроизведения
-        await self.handle_send_command(ServiceCall(self.hass,domain=None,service=None,data={"command": 'STOP'}))
-        # Set status
-        self._attr_state = MediaPlayerState.IDLE
-        # Обновляем состояние, если это необходимо
-        self.async_write_ha_state()
-        _LOGGER.warning("media_stop")
-
-#======================================================================================================
-
-    async def async_added_to_hass(self):
-        """Called when entity is added to hass."""
-        # Регистрация сервиса
-        self.hass.services.async_register(
-            domain=self._name.replace(".", "_").replace(" ", "_").lower(),
-            service="learn_command",
-            service_func=self.handle_learn_command,
-            schema=None  # Здесь можно добавить vol.Schema для валидации данных
-        )
-
-        # Регистрация сервиса для отправки команды
-        self.hass.services.async_register(
-            domain=self._name.replace(".", "_").replace(" ", "_").lower(),
-            service="send_command",
-            service_func=self.handle_send_command,
-            schema=None  # Здесь можно добавить vol.Schema для валидации данных
-        )
+"""SmartifyTV integration."""
+from __future__ import annotations
+
+import logging
+import voluptuous as vol
+import asyncio
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
+from homeassistant.components.media_player import (
+    MediaType,
+    MediaPlayerState,
+    MediaPlayerEntity,
+    MediaPlayerDeviceClass,
+    MediaPlayerEntityFeature,
+)
+from homeassistant.const import CONF_NAME, STATE_OFF, STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN
+
+from .macros import MACRO_STEPS_SCHEMA, MacroSegment, compile_macro, normalize_steps
+from .planner import DIGIT_KEYS, ChannelPlanner, parse_channel_list
+from .scheduler import async_get_scheduler
+from .backends import async_get_backend
+from .ircodes import LIBRARY_FORMATS, parse_library
+from .transport import TransportError
+from .const import (
+    DOMAIN,
+    DEFAULT_NAME,
+    CONF_POWER_ENTITY,
+    CONF_IR_REMOTE,
+    CONF_VOLUME_STEPS,
+    CONF_VOLUME_RESET,
+    CONF_POWER_ON_THRESHOLD,
+    CONF_POWER_OFF_THRESHOLD,
+    CONF_POWER_DWELL,
+    CONF_DIRECT_TRANSPORT,
+    CONF_CHANNELS,
+    CONF_CHANNEL_DIGIT_TIMEOUT,
+    CONF_MACROS,
+    COMMAND_NAMES,
+    INTERCOMMAND_PAUSE,
+    DATA_DISPATCHER,
+    DATA_ENTITY,
+    DATA_STATS,
+    ATTR_COMMAND,
+    ATTR_COMMANDS,
+    ATTR_SKIP_LEARNED,
+    ATTR_CHANNEL_NUMBER,
+    ATTR_MACRO,
+    ATTR_STEPS,
+    ATTR_FORMAT,
+    ATTR_CODES,
+    ATTR_FILE,
+    ATTR_MAPPING,
+    DATA_IMPORTED_CODES,
+    IMPORT_CODES_DIR,
+    SERVICE_LEARN_COMMAND,
+    SERVICE_LEARN_SESSION,
+    SERVICE_IMPORT_CODES,
+    SERVICE_SEND_COMMAND,
+    SERVICE_SET_CHANNEL,
+    SERVICE_DEFINE_MACRO,
+    SERVICE_REMOVE_MACRO,
+    SERVICE_RUN_MACRO,
+    EVENT_LEARN_PROGRESS,
+    VOLUME_COALESCE_WINDOW,
+    VOLUME_REPEAT_PAUSE,
+    DEFAULT_VOLUME_STEPS,
+    DEFAULT_POWER_ON_THRESHOLD,
+    DEFAULT_POWER_OFF_THRESHOLD,
+    DEFAULT_POWER_DWELL,
+    POWER_CONFIRM_TIMEOUT,
+    POWER_RETRIES,
+    POWER_SLOW_CONFIRM_TIMEOUT,
+    DEFAULT_CHANNEL_DIGIT_TIMEOUT,
+    MAX_CHANNEL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Схемы сервисов сущностей
+LEARN_COMMAND_SCHEMA = {vol.Required(ATTR_COMMAND): cv.string}
+SEND_COMMAND_SCHEMA = {vol.Required(ATTR_COMMAND): cv.string}
+LEARN_SESSION_SCHEMA = {
+    # Без списка - все основные команды COMMAND_NAMES
+    vol.Optional(ATTR_COMMANDS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_SKIP_LEARNED, default=True): cv.boolean,
+}
+SET_CHANNEL_SCHEMA = {
+    vol.Required(ATTR_CHANNEL_NUMBER): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_CHANNEL)),
+}
+DEFINE_MACRO_SCHEMA = {
+    vol.Required(ATTR_MACRO): cv.string,
+    vol.Required(ATTR_STEPS): MACRO_STEPS_SCHEMA,
+}
+MACRO_SCHEMA = {vol.Required(ATTR_MACRO): cv.string}
+IMPORT_CODES_SCHEMA = {
+    vol.Required(ATTR_FORMAT): vol.In(LIBRARY_FORMATS),
+    # Текст библиотеки или путь к файлу относительно папки конфигурации
+    vol.Optional(ATTR_CODES): cv.string,
+    vol.Optional(ATTR_FILE): cv.string,
+    # Имя кнопки в библиотеке -> команда SmartifyTV, если автоматического сопоставления мало
+    vol.Optional(ATTR_MAPPING): {cv.string: cv.string},
+}
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    """Set up Easy TV media player from a config entry."""
+    entity = SmartifyTVMediaPlayer(hass, entry)
+    # Ссылка на сущность для диагностики записи
+    hass.data[DOMAIN][entry.entry_id][DATA_ENTITY] = entity
+    async_add_entities([entity])
+
+    # Сервисы сущностей домена smartify_tv: регистрируются один раз на платформу,
+    # при повторных вызовах (другие записи) платформа их пропускает
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_LEARN_COMMAND, LEARN_COMMAND_SCHEMA, "async_learn_command")
+    platform.async_register_entity_service(SERVICE_LEARN_SESSION, LEARN_SESSION_SCHEMA, "async_learn_session")
+    platform.async_register_entity_service(SERVICE_SEND_COMMAND, SEND_COMMAND_SCHEMA, "async_send_command")
+    platform.async_register_entity_service(SERVICE_SET_CHANNEL, SET_CHANNEL_SCHEMA, "async_set_channel")
+    platform.async_register_entity_service(SERVICE_DEFINE_MACRO, DEFINE_MACRO_SCHEMA, "async_define_macro")
+    platform.async_register_entity_service(SERVICE_REMOVE_MACRO, MACRO_SCHEMA, "async_remove_macro")
+    platform.async_register_entity_service(SERVICE_RUN_MACRO, MACRO_SCHEMA, "async_run_macro")
+    platform.async_register_entity_service(SERVICE_IMPORT_CODES, IMPORT_CODES_SCHEMA, "async_import_codes")
+
+# Состояния воспроизведения включённого ТВ, которые сохраняются между перезапусками
+_PLAYBACK_STATES = (MediaPlayerState.PLAYING, MediaPlayerState.PAUSED, MediaPlayerState.IDLE)
+
+def _is_available(state: State | None) -> bool:
+    """Return True if the entity state holds a usable value."""
+    return state is not None and state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
+
+@dataclass
+class SmartifyTVExtraStoredData(ExtraStoredData):
+    """State of the TV that cannot be read back from it, kept across restarts."""
+
+    current_channel: int
+    previous_channel: int | None
+    channel_known: bool
+    volume_level: float
+    volume_synced: bool
+    is_mute: bool
+    playback: str | None  # playing/paused/idle, если ТВ был включён
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dict representation of the stored data."""
+        return {
+            "current_channel": self.current_channel,
+            "previous_channel": self.previous_channel,
+            "channel_known": self.channel_known,
+            "volume_level": self.volume_level,
+            "volume_synced": self.volume_synced,
+            "is_mute": self.is_mute,
+            "playback": self.playback,
+        }
+
+    @classmethod
+    def from_dict(cls, restored: dict[str, Any]) -> SmartifyTVExtraStoredData | None:
+        """Initialize the stored data from a dict, or return None if it is not valid."""
+        try:
+            stored = cls(
+                int(restored["current_channel"]),
+                None,
+                bool(restored.get("channel_known", False)),
+                float(restored["volume_level"]),
+                bool(restored.get("volume_synced", False)),
+                bool(restored.get("is_mute", False)),
+                None,
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        # Необязательные поля: испорченное значение отбрасываем, не теряя остальное состояние
+        try:
+            previous = int(restored["previous_channel"])
+        except (KeyError, TypeError, ValueError):
+            previous = None
+        if previous is not None and 1 <= previous <= MAX_CHANNEL:
+            stored.previous_channel = previous
+        if (playback := restored.get("playback")) in _PLAYBACK_STATES:
+            stored.playback = str(playback)
+        return stored
+
+class SmartifyTVMediaPlayer(MediaPlayerEntity, RestoreEntity):
+    """Representation of an Easy TV media player."""
+
+    # Состояние обновляется по событиям розетки и пульта, опрос не нужен
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
+        """Initialize the media player."""
+        self.hass = hass
+        self._state = STATE_OFF
+        self._attr_state = MediaPlayerState.OFF
+        self._config_entry = config_entry
+        self._name = config_entry.data.get("name", DEFAULT_NAME)  # Извлекаем имя из config_entry
+        self._unique_id = config_entry.data.get("unique_id")  # Извлекаем сохраненный unique_id
+        self._power_entity = config_entry.data.get(CONF_POWER_ENTITY)
+        self._ir_remote = config_entry.data.get(CONF_IR_REMOTE)
+        self._ir_remote_mac = None  # MAC _ir_remote (если хоть одну команду учили)
+        self._ir_remote_platform = None  # Платформа пульта
+        self._ir_remote_cmd_file = None  # Где хранятся изученные коды пульта (для Broadlink - путь к файлу)
+        self._backend = None  # Бэкенд IR-платформы пульта (IRBackend)
+        self._backend_task = None  # Повторный поиск бэкенда, когда пульт появится в реестре
+        self._is_unavailable = False
+        self._power_available = False  # Розетка отдаёт показания
+        self._ir_available = False  # Пульт доступен
+        self._unsub_dispatcher = None  # Отписка от событий розетки и пульта
+        self._pending_power = None  # Состояние питания, ожидающее окончания выдержки
+        self._power_reading = None  # Последнее показание розетки как есть (для повторов POWER_ON/POWER_OFF)
+        self._unsub_power_dwell = None
+        # Ожидающие подтверждения питания после POWER_ON/POWER_OFF: (ожидаемое состояние, future)
+        self._power_waiters = []
+        self._is_mute = False  # Атрибут для хранения состояния звука
+        self._volume_level = 0.2  # Начальный уровень громкости (от 0.0 до 1.0) - не учитывается))
+        self._current_channel = 1  # Начальный канал
+        # Канал, на котором ТВ сейчас действительно стоит, нам известен только после
+        # первого переключения цифрами; до этого планировщик не пользуется CHANNEL_UP/DOWN
+        self._channel_known = False
+        self._previous_channel = None  # Канал до последнего переключения (для CHANNEL_RECALL)
+        self._volume_steps = None
+        self._volume_synced = False  # Учтённый уровень подтверждён сбросом «в ноль»
+        self._pending_volume_steps = 0  # Накопленные шаги громкости (+ вверх, - вниз)
+        self._volume_flush = None  # Future собираемой пачки шагов громкости
+        self._command_table = None  # Декодированные IR-пакеты изученных команд (CommandTable)
+        # Очередь команд пульта, общая для всех ТВ на этом пульте: она же выдерживает паузы
+        self._scheduler = async_get_scheduler(hass, self._ir_remote)
+        self._transport = None
+        self._learning_locked = False
+        self._learn_progress = None  # Ход сессии обучения (атрибут learn_progress)
+        self._setup_time = None  # Время начальной настройки сущности, сек
+        # Счётчики и задержки команд (ничего не делают, если инструментирование выключено)
+        self._stats = hass.data[DOMAIN][config_entry.entry_id][DATA_STATS]
+        self._apply_options(config_entry.options)
+
+    def _apply_options(self, options):
+        """Apply the tunables from the config entry options."""
+        # Пороги включения/выключения (гистерезис) и выдержка перед сменой состояния питания
+        self._power_on_threshold = options.get(CONF_POWER_ON_THRESHOLD, DEFAULT_POWER_ON_THRESHOLD)
+        self._power_off_threshold = options.get(CONF_POWER_OFF_THRESHOLD, DEFAULT_POWER_OFF_THRESHOLD)
+        self._power_dwell = options.get(CONF_POWER_DWELL, DEFAULT_POWER_DWELL)
+        self._channel_planner = ChannelPlanner(
+            parse_channel_list(options.get(CONF_CHANNELS, "")),
+            options.get(CONF_CHANNEL_DIGIT_TIMEOUT, DEFAULT_CHANNEL_DIGIT_TIMEOUT),
+        )
+        # Число нажатий на весь диапазон громкости и нужен ли сброс «в ноль» для синхронизации
+        volume_steps = options.get(CONF_VOLUME_STEPS, DEFAULT_VOLUME_STEPS)
+        if volume_steps != self._volume_steps:
+            self._volume_steps = volume_steps
+            self._volume_synced = False
+        self._volume_reset = options.get(CONF_VOLUME_RESET, False)
+        # Макросы компилируются в передачи пульта один раз - при загрузке и при определении
+        self._macros = {
+            name: compile_macro(normalize_steps(steps))
+            for name, steps in options.get(CONF_MACROS, {}).items()
+        }
+        # Прямая отправка пакетов на Broadlink (если включена в настройках и пульт удалось найти)
+        self._direct_transport = options.get(CONF_DIRECT_TRANSPORT, False)
+
+    async def async_initialize(self):
+        """Асинхронная настройка IR устройства."""
+        await self._async_setup_remote()
+        # Проверяем начальное состояние; записывать его не нужно - платформа запишет
+        # состояние сама сразу после async_added_to_hass
+        self._update_power_state()
+
+    async def _async_setup_remote(self):
+        """Resolve the IR remote backend, its codes and the direct transport."""
+        # Бэкенд выбирается по платформе пульта в реестре сущностей и общий для всех ТВ на пульте
+        self._backend = async_get_backend(self.hass, self._ir_remote)
+        self._ir_remote_platform = self._backend.platform
+        self._ir_remote_mac = self._backend.device_id
+        self._ir_remote_cmd_file = self._backend.source
+        # Коды читаются из общего кэша бэкенда; None - у этого ТВ ещё нет изученных команд
+        self._command_table = await self._backend.async_get_command_table(self._unique_id)
+        self._transport = self._backend.async_get_transport() if self._direct_transport else None
+
+    async def async_update_config(self):
+        """Apply changed config entry data and options in place, keeping the entity and its state."""
+        data = self._config_entry.data
+        direct_transport = self._direct_transport
+        thresholds = (self._power_on_threshold, self._power_off_threshold)
+        shown = self._shown_state()
+        self._apply_options(self._config_entry.options)
+        power_entity = data.get(CONF_POWER_ENTITY)
+        ir_remote = data.get(CONF_IR_REMOTE)
+        remote_changed = ir_remote != self._ir_remote
+        power_changed = (
+            power_entity != self._power_entity
+            or thresholds != (self._power_on_threshold, self._power_off_threshold)
+        )
+        if power_entity != self._power_entity or remote_changed:
+            self._power_entity = power_entity
+            self._ir_remote = ir_remote
+            self._subscribe()
+        if remote_changed:
+            # Другой пульт - другая очередь и бэкенд; перечитываются только коды нового пульта
+            self._scheduler = async_get_scheduler(self.hass, ir_remote)
+            await self._async_setup_remote()
+        elif direct_transport != self._direct_transport:
+            self._transport = self._backend.async_get_transport() if self._direct_transport else None
+        if power_changed or remote_changed:
+            # Другие розетка, пульт или пороги - заново оцениваем текущие показания с обычными
+            # гистерезисом и выдержкой; прочие настройки (например, макросы) питание не трогают
+            self._ir_available = _is_available(self.hass.states.get(self._ir_remote))
+            self._apply_power_reading(self.hass.states.get(self._power_entity), write=False)
+        # Записываем состояние, только если изменилось то, что видно пользователю
+        if self._shown_state() != shown:
+            self.async_write_ha_state()
+
+    def _shown_state(self):
+        """Return the state and attributes the entity writes to the state machine."""
+        return self._visible_state(), self.extra_state_attributes
+
+    @callback
+    def _subscribe(self):
+        """Subscribe to the power entity and IR remote, replacing the previous subscription."""
+        self._unsubscribe()
+        # Подписываемся на изменения розетки и пульта через общий диспетчер
+        self._unsub_dispatcher = self.hass.data[DOMAIN][DATA_DISPATCHER].async_subscribe(
+            (self._power_entity, self._ir_remote),
+            self._handle_power_state_change,
+        )
+
+    @callback
+    def _unsubscribe(self):
+        """Unsubscribe from the power entity and IR remote."""
+        if self._unsub_dispatcher is not None:
+            self._unsub_dispatcher()
+            self._unsub_dispatcher = None
+
+    @property
+    def name(self):
+        """Return the name of the device."""
+        return self._name
+
+    @property
+    def state(self):
+        """Return the state of the device."""
+        # return self._state
+        return self._attr_state
+
+    @property
+    def device_class(self):
+        """Return the class of this device."""
+        return MediaPlayerDeviceClass.TV
+
+    @property
+    def icon(self):
+        """Return the icon to use in the frontend."""
+        return "mdi:television-classic"
+
+    @property
+    def supported_features(self):
+        """Flag media player features that are supported."""
+        return (
+            MediaPlayerEntityFeature.TURN_ON |
+            MediaPlayerEntityFeature.TURN_OFF |
+            MediaPlayerEntityFeature.VOLUME_MUTE |
+            MediaPlayerEntityFeature.VOLUME_STEP |
+            MediaPlayerEntityFeature.VOLUME_SET |
+            MediaPlayerEntityFeature.PREVIOUS_TRACK |
+            MediaPlayerEntityFeature.NEXT_TRACK |
+            MediaPlayerEntityFeature.PLAY_MEDIA |
+            MediaPlayerEntityFeature.PLAY |
+            MediaPlayerEntityFeature.STOP |
+            MediaPlayerEntityFeature.PAUSE
+        )
+
+    @property
+    def unique_id(self):
+        """Return a unique ID for this media player."""
+        return self._unique_id
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra state attributes."""
+        return {
+            "is_unavailable": self._is_unavailable, 
+            "uuid": self._unique_id,
+            "ir_platform": self._ir_remote_platform,
+            "ir_mac": self._ir_remote_mac,
+            "ir_file": self._ir_remote_cmd_file,
+            # Сами IR-коды в состояние не попадают (они есть в диагностике), только имена команд
+            "ir_commands": sorted(self._command_table) if self._command_table else [],
+            "macros": sorted(self._macros),
+            "learn_progress": self._learn_progress,
+        }
+
+    @callback
+    def async_get_diagnostics(self):
+        """Return diagnostics data, including the learned IR codes."""
+        return {
+            "entity_id": self.entity_id,
+            "state": self._attr_state,
+            "ir_platform": self._ir_remote_platform,
+            "ir_mac": self._ir_remote_mac,
+            "ir_file": self._ir_remote_cmd_file,
+            "ir_backend": self._backend.as_dict() if self._backend else None,
+            "ir_cmd": self._command_table.as_dict() if self._command_table else None,
+            "ir_queue": self._scheduler.as_dict(),
+            "channel": {
+                "current": self._current_channel,
+                "previous": self._previous_channel,
+                "known": self._channel_known,
+                "list": self._channel_planner.channels,
+            },
+            "setup_time": self._setup_time,
+            "stats": self._stats.as_dict(),
+        }
+
+    @property
+    def is_volume_muted(self):
+        """Return True if volume is muted."""
+        return self._is_mute
+
+    @property
+    def volume_level(self):
+        """Return the volume level of the media player (0.1)."""
+        return self._volume_level
+
+    @property
+    def media_title(self):
+        """Return the current channel."""
+        return f"Channel {self._current_channel}"
+
+    async def async_check_command_existence(self, key_to_check):
+        """Асинхронно проверяет наличие команды в таблице изученных команд."""
+        # Бэкенд не знает изученных команд платформы - проверить команду нельзя,
+        # поэтому пропускаем её к пульту как есть
+        if self._backend is None or not self._backend.checks_commands:
+            return True
+        return self._command_table is not None and key_to_check in self._command_table
+
+    async def async_update(self):
+        """Fetch new state data for the media player."""
+        # Ничего не опрашиваем: состояние приходит через диспетчер событий интеграции
+
+# ===================================================================================
+
+    @callback
+    def _update_power_state(self):
+        """Обновление состояния по текущим состояниям розетки и пульта."""
+        self._ir_available = _is_available(self.hass.states.get(self._ir_remote))
+        if not self._ir_available:
+            _LOGGER.warning("IR entity %s is unavailable or unknown", self._ir_remote)
+        # Начальное состояние принимаем сразу, без выдержки
+        self._apply_power_reading(self.hass.states.get(self._power_entity), initial=True)
+
+    @callback
+    def _handle_power_state_change(self, event: Event):
+        """Обработчик изменения состояния розетки или IR-пульта."""
+        # Диспетчер интеграции присылает только события наших сущностей;
+        # новое состояние берём прямо из события, без обращения к state machine
+        self._stats.record_power_event()
+        new_state = event.data.get("new_state")
+        if event.data["entity_id"] == self._power_entity:
+            self._apply_power_reading(new_state)
+            return
+        visible = self._visible_state()
+        was_available = self._ir_available
+        self._ir_available = _is_available(new_state)
+        self._is_unavailable = not (self._power_available and self._ir_available)
+        self._async_write_if_changed(visible)
+        if (
+            self._ir_available
+            and not was_available
+            and self._backend is not None
+            and not self._backend.resolved
+            and self._backend_task is None
+        ):
+            # Пульт загрузился позже ТВ - теперь его платформа есть в реестре
+            self._backend_task = self.hass.async_create_task(self._async_resolve_backend())
+
+    async def _async_resolve_backend(self):
+        """Resolve the backend again once the IR remote has appeared."""
+        try:
+            shown = self._shown_state()
+            await self._async_setup_remote()
+            if self._backend.resolved:
+                _LOGGER.info("%s: IR remote %s resolved as %s", self._name, self._ir_remote, self._backend.platform)
+            if self._shown_state() != shown:
+                self.async_write_ha_state()
+        finally:
+            self._backend_task = None
+
+    @callback
+    def _cancel_backend_task(self):
+        """Cancel a pending backend resolution."""
+        if self._backend_task is not None:
+            self._backend_task.cancel()
+            self._backend_task = None
+
+    @callback
+    def _apply_power_reading(self, state: State | None, initial: bool = False, write: bool = True):
+        """Разбор показания розетки с гистерезисом и выдержкой."""
+        visible = self._visible_state()
+        power_on = None  # None - показание в полосе гистерезиса, состояние не меняем
+        self._power_available = _is_available(state)
+        self._power_reading = state.state if state is not None else None
+        if not self._power_available:
+            _LOGGER.debug("Power entity %s is unavailable or unknown", self._power_entity)
+            power_on = False
+        else:
+            try:
+                power_value = float(state.state)
+            except ValueError:
+                _LOGGER.warning("Invalid power value: %s", state.state)
+                power_on = False
+            else:
+                if power_value > self._power_on_threshold:
+                    power_on = True
+                elif power_value <= self._power_off_threshold:
+                    power_on = False
+        # Смену питания, которую мы сами только что скомандовали, принимаем без выдержки
+        confirmed = self._power_available and self._resolve_power_waiters(power_on)
+
+        if power_on is None or power_on == (self._state == STATE_ON):
+            # Показание не подтверждает ожидаемую смену состояния - выдержка начинается заново
+            self._cancel_power_dwell()
+        elif initial or confirmed or not self._power_available or self._power_dwell <= 0:
+            self._cancel_power_dwell()
+            self._set_power(power_on)
+        elif self._pending_power != power_on:
+            self._cancel_power_dwell()
+            self._pending_power = power_on
+            self._unsub_power_dwell = async_call_later(
+                self.hass, self._power_dwell, self._async_power_dwell_elapsed
+            )
+        self._is_unavailable = not (self._power_available and self._ir_available)
+        if write and not initial:
+            self._async_write_if_changed(visible)
+
+    @callback
+    def _resolve_power_waiters(self, power_on):
+        """Wake up power transitions confirmed by the reading; return True if there were any."""
+        confirmed = False
+        for target, waiter in self._power_waiters:
+            if target == power_on and not waiter.done():
+                waiter.set_result(None)
+                confirmed = True
+        return confirmed
+
+    @callback
+    def _async_power_dwell_elapsed(self, _now):
+        """Новое состояние питания продержалось всю выдержку - принимаем его."""
+        self._unsub_power_dwell = None
+        visible = self._visible_state()
+        self._set_power(self._pending_power)
+        self._pending_power = None
+        self._async_write_if_changed(visible)
+
+    @callback
+    def _cancel_power_dwell(self):
+        """Отменяем ожидающую смену состояния питания."""
+        self._pending_power = None
+        if self._unsub_power_dwell is not None:
+            self._unsub_power_dwell()
+            self._unsub_power_dwell = None
+
+    def _set_power(self, power_on):
+        """Set the power-derived state."""
+        if power_on == (self._state == STATE_ON):
+            return
+        self._state = STATE_ON if power_on else STATE_OFF
+        self._attr_state = MediaPlayerState.ON if power_on else MediaPlayerState.OFF
+
+    def _visible_state(self):
+        """Return the part of the state written by the power handlers."""
+        return self._attr_state, self._is_unavailable
+
+    @callback
+    def async_write_ha_state(self):
+        """Write the state to the state machine, counting writes."""
+        self._stats.record_state_write()
+        super().async_write_ha_state()
+
+    @callback
+    def _async_write_if_changed(self, visible):
+        """Write state only if a visible value has changed."""
+        if self._visible_state() != visible:
+            self.async_write_ha_state()
+
+    async def async_turn_on(self):
+        """Turn the media player on."""
+        if self._state == STATE_OFF:
+            await self._async_power_transition(True)
+
+    async def async_turn_off(self):
+        """Turn the media player off."""
+        if self._state == STATE_ON:
+            await self._async_power_transition(False)
+
+    async def _async_power_transition(self, power_on):
+        """Send POWER_ON/POWER_OFF until the power entity confirms the new state."""
+        command = 'POWER_ON' if power_on else 'POWER_OFF'
+        if not await self.async_check_command_existence(command):
+            raise HomeAssistantError(f"Command {command} is not learned for {self._name}")
+        if self._pending_power == power_on:
+            # Розетка уже показывает нужное состояние, идёт только выдержка - принимаем его сразу
+            visible = self._visible_state()
+            self._cancel_power_dwell()
+            self._set_power(power_on)
+            self._async_write_if_changed(visible)
+            return
+        if not self._power_available:
+            # Подтвердить нечем - отправляем один раз, как есть
+            _LOGGER.warning(
+                "%s: power entity %s is unavailable, %s is not confirmed", self._name, self._power_entity, command
+            )
+            await self._async_send_commands([command])
+            return
+        # Повтор переключающего кода (один код на включение и выключение) вернул бы ТВ обратно
+        toggle = self._is_power_toggle()
+        attempts = 0
+        while True:
+            attempts += 1
+            # Ждать начинаем до отправки: розетка может ответить, пока пульт ещё передаёт
+            waiter = self.hass.loop.create_future()
+            entry = (power_on, waiter)
+            self._power_waiters.append(entry)
+            reading = self._power_reading
+            try:
+                await self._async_send_commands([command])
+                try:
+                    # Выходим, как только показание пересечёт порог, без фиксированных пауз
+                    await asyncio.wait_for(asyncio.shield(waiter), POWER_CONFIRM_TIMEOUT)
+                    return
+                except asyncio.TimeoutError:
+                    _LOGGER.debug(
+                        "%s: %s not confirmed by %s (attempt %s)", self._name, command, self._power_entity, attempts
+                    )
+                if not toggle and self._power_reading == reading:
+                    # Розетка не шелохнулась - ТВ, скорее всего, не принял код: повторяем
+                    if attempts <= POWER_RETRIES:
+                        continue
+                    break
+                # ТВ уже реагирует (или повтор небезопасен) - просто ждём медленную розетку дольше
+                try:
+                    await asyncio.wait_for(waiter, POWER_SLOW_CONFIRM_TIMEOUT)
+                    return
+                except asyncio.TimeoutError:
+                    break
+            finally:
+                self._power_waiters.remove(entry)
+        raise HomeAssistantError(
+            f"{self._name} did not turn {'on' if power_on else 'off'}: "
+            f"{self._power_entity} did not confirm {command} after {attempts} attempt(s)"
+        )
+
+    def _is_power_toggle(self):
+        """Return True unless POWER_ON and POWER_OFF are known to be different codes."""
+        table = self._command_table
+        if table is None or table.is_toggle('POWER_ON') or table.is_toggle('POWER_OFF'):
+            return True
+        power_on = table.get('POWER_ON')
+        return power_on is None or power_on == table.get('POWER_OFF')
+
+# ===================================================================================
+
+    async def async_send_command(self, command):
+        """Send a learned command (also the smartify_tv.send_command entity service)."""
+        # Проверяем наличие ключа
+        if await self.async_check_command_existence(command):
+            await self._async_send_commands([command])
+
+    async def _async_send_commands(self, commands, delay_secs=INTERCOMMAND_PAUSE, num_repeats=1, label=None):
+        """Send a sequence of commands as one IR transmission."""
+        await self._async_send_segments(
+            [MacroSegment(commands, delay_secs, num_repeats, 0.0)],
+            label or (commands[0] if len(commands) == 1 else "SEQUENCE"),
+        )
+
+    async def _async_send_segments(self, segments, label):
+        """Send transmissions back to back in one turn of the remote queue."""
+        transmit_started = None
+
+        async def _async_run_segments():
+            nonlocal transmit_started
+            transmit_started = time.monotonic()
+            for index, segment in enumerate(segments):
+                if index and segments[index - 1].pause_after > 0:
+                    await asyncio.sleep(segments[index - 1].pause_after)
+                await self._async_transmit(segment.commands, segment.delay_secs, segment.num_repeats)
+
+        # Очередь пульта не даст двум ТВ на одном пульте передавать одновременно
+        if not self._stats.enabled:
+            await self._scheduler.async_run(_async_run_segments)
+            return
+        submitted = time.monotonic()
+        ok = False
+        try:
+            await self._scheduler.async_run(_async_run_segments)
+            ok = True
+        finally:
+            finished = time.monotonic()
+            self._stats.record_command(
+                label, finished - submitted, (transmit_started or finished) - submitted, ok
+            )
+
+    async def _async_transmit(self, commands, delay_secs, num_repeats):
+        """Transmit commands directly or through remote.send_command."""
+        packets = self._resolve_packets(commands) if self._transport is not None else None
+        if packets is not None:
+            try:
+                await self._transport.async_send(packets, delay_secs, num_repeats)
+                return
+            except TransportError as err:
+                # Часть пакетов уже ушла - повтор через сервис продублировал бы нажатия
+                if err.sent:
+                    raise
+                _LOGGER.warning("%s: direct send failed, using remote service: %s", self._name, err)
+        if self._command_table is not None:
+            # Импортированных команд нет в хранилище пульта - передаём их коды
+            commands = [self._command_table.service_command(command) for command in commands]
+        # Пульт сам выдерживает delay_secs между кодами
+        await self._backend.async_send_command(self._unique_id, commands, delay_secs, num_repeats)
+
+    def _resolve_packets(self, commands):
+        """Return raw IR packets for the commands, or None if any of them cannot be sent directly."""
+        if self._command_table is None:
+            return None
+        packets = []
+        for command in commands:
+            # Пакеты уже декодированы при загрузке кодов; переключаемые коды (несколько
+            # пакетов) чередует сам Broadlink - их отправляем через сервис
+            packet = self._command_table.packet(command)
+            if packet is None:
+                return None
+            packets.append(packet)
+        return packets
+
+    async def async_learn_command(self, command):
+        """Learn a command (the smartify_tv.learn_command entity service)."""
+        if self._learning_locked:
+            raise HomeAssistantError(f"{self._name} is already learning a command")
+        self._learning_locked = True
+        try:
+            # Ждём, пока пульт поймает код
+            await self._backend.async_learn_command(self._unique_id, command)
+            if self._backend.checks_commands:
+                # Broadlink записывает файл кодов сразу после обучения - сравниваем код с прежним
+                # (так переобучение отличается от уже сохранённой команды) и перечитываем таблицу
+                await self._async_code_changed(command)
+                self._command_table = await self._backend.async_get_command_table(self._unique_id)
+                self.async_write_ha_state()
+        finally:
+            self._learning_locked = False
+
+    async def async_learn_session(self, commands=None, skip_learned=True):
+        """Learn many commands back to back (the smartify_tv.learn_session entity service)."""
+        if self._learning_locked:
+            raise HomeAssistantError(f"{self._name} is already learning a command")
+        commands = list(dict.fromkeys(commands or COMMAND_NAMES))
+        if skip_learned and self._backend.checks_commands and self._command_table is not None:
+            commands = [command for command in commands if command not in self._command_table]
+        if not commands:
+            return
+        learned = []
+        failed = []
+        self._learning_locked = True
+        try:
+            for index, command in enumerate(commands):
+                self._report_learn_progress(command, index, len(commands), "waiting")
+                try:
+                    # Сервис пульта возвращается сразу после того, как код пойман и сохранён
+                    await self._backend.async_learn_command(self._unique_id, command)
+                    # Broadlink не сообщает об ошибке, если код не пойман за отведённое время, -
+                    # проверяем, что код кнопки появился или сменился в хранилище пульта
+                    ok = await self._async_code_changed(command)
+                except HomeAssistantError as err:
+                    _LOGGER.warning("%s: command %s was not learned: %s", self._name, command, err)
+                    ok = False
+                if not ok:
+                    failed.append(command)
+                    self._report_learn_progress(command, index, len(commands), "failed")
+                    continue
+                learned.append(command)
+                self._report_learn_progress(command, index, len(commands), "learned")
+            if self._backend.checks_commands:
+                # Таблицу команд сущности обновляем один раз на всю сессию
+                self._command_table = await self._backend.async_get_command_table(self._unique_id)
+        finally:
+            self._learning_locked = False
+            self._learn_progress = None
+            self.hass.bus.async_fire(
+                EVENT_LEARN_PROGRESS,
+                {"entity_id": self.entity_id, "status": "finished", "learned": learned, "failed": failed},
+            )
+            self.async_write_ha_state()
+
+    async def async_import_codes(self, format, codes=None, file=None, mapping=None):
+        """Import a Pronto, LIRC or SmartIR code library (the smartify_tv.import_codes entity service)."""
+        if not self._backend.supports_import:
+            raise HomeAssistantError(f"IR remote of {self._name} cannot send imported codes")
+        if (codes is None) == (file is None):
+            raise HomeAssistantError("Either codes or file must be given")
+        if file is not None:
+            # Проверка пути и чтение обращаются к диску - в executor
+            codes = await self.hass.async_add_executor_job(self._read_code_library, file)
+        try:
+            # Разбор и перекодирование сотен кодов - в executor, не в цикле событий
+            packets, toggles = await self.hass.async_add_executor_job(parse_library, format, codes, mapping)
+        except ValueError as err:
+            raise HomeAssistantError(f"Cannot parse the {format} library: {err}") from err
+        if not packets:
+            raise HomeAssistantError(f"No codes found in the {format} library")
+        await self.hass.data[DOMAIN][DATA_IMPORTED_CODES].async_import(self._unique_id, packets, toggles)
+        # Изученные пультом коды остаются главнее импортированных
+        self._command_table = await self._backend.async_get_command_table(self._unique_id)
+        _LOGGER.info("%s: imported %s commands from a %s library", self._name, len(packets), format)
+        self.async_write_ha_state()
+
+    def _read_code_library(self, file):
+        """Read a code library file (runs in the executor)."""
+        if Path(file).is_absolute():
+            # Абсолютный путь - только из allowlist_external_dirs
+            path = Path(file)
+            if not self.hass.config.is_allowed_path(file):
+                raise HomeAssistantError(f"Access to {file} is not allowed")
+        else:
+            # Относительный путь - внутри /config/smartify_tv, без выхода из неё через ".."
+            base = Path(self.hass.config.path(IMPORT_CODES_DIR)).resolve()
+            path = (base / file).resolve()
+            if not path.is_relative_to(base):
+                raise HomeAssistantError(f"{file} is outside the {IMPORT_CODES_DIR} folder")
+        try:
+            return path.read_text("utf-8")
+        except (OSError, UnicodeDecodeError) as err:
+            raise HomeAssistantError(f"Cannot read {file}: {err}") from err
+
+    async def _async_code_changed(self, command):
+        """Return True if the stored code of the command appeared or changed since the last table load."""
+        if not self._backend.checks_commands:
+            # Хранилище кодов пульта нам не видно - верим сервису пульта
+            return True
+        previous_code = self._command_table.get(command) if self._command_table else None
+        table = await self._backend.async_get_command_table(self._unique_id)
+        code = table.get(command) if table else None
+        if code is None or code == previous_code:
+            _LOGGER.warning("%s: command %s was not learned", self._name, command)
+            return False
+        return True
+
+    @callback
+    def _report_learn_progress(self, command, index, total, status):
+        """Publish the learning progress as an event and the learn_progress attribute."""
+        self._learn_progress = {"command": command, "index": index + 1, "total": total, "status": status}
+        self.hass.bus.async_fire(EVENT_LEARN_PROGRESS, {"entity_id": self.entity_id, **self._learn_progress})
+        self.async_write_ha_state()
+
+    async def async_define_macro(self, macro, steps):
+        """Define or replace a macro (the smartify_tv.define_macro entity service)."""
+        steps = normalize_steps(steps)
+        missing = sorted({
+            step[ATTR_COMMAND] for step in steps if not await self.async_check_command_existence(step[ATTR_COMMAND])
+        })
+        if missing:
+            raise HomeAssistantError(f"Commands {', '.join(missing)} are not learned for {self._name}")
+        self._macros[macro] = compile_macro(steps)
+        self._save_macros({**self._config_entry.options.get(CONF_MACROS, {}), macro: steps})
+
+    async def async_remove_macro(self, macro):
+        """Remove a macro (the smartify_tv.remove_macro entity service)."""
+        if self._macros.pop(macro, None) is None:
+            raise HomeAssistantError(f"Macro {macro} is not defined for {self._name}")
+        macros = dict(self._config_entry.options.get(CONF_MACROS, {}))
+        macros.pop(macro, None)
+        self._save_macros(macros)
+
+    def _save_macros(self, macros):
+        """Store macros in the config entry options; the entry is not reloaded for this."""
+        self.hass.config_entries.async_update_entry(
+            self._config_entry, options={**self._config_entry.options, CONF_MACROS: macros}
+        )
+        self.async_write_ha_state()
+
+    async def async_run_macro(self, macro):
+        """Run a macro (the smartify_tv.run_macro entity service)."""
+        segments = self._macros.get(macro)
+        if segments is None:
+            raise HomeAssistantError(f"Macro {macro} is not defined for {self._name}")
+        # Весь макрос занимает пульт целиком, паузы между передачами выдерживаются внутри
+        await self._async_send_segments(segments, f"MACRO {macro}")
+
+#======================================================================================================
+
+    async def async_mute_volume(self, mute: bool):
+        """Mute or unmute the volume."""
+        command = 'MUTE' if mute else 'UNMUTE'
+        if mute == self._is_mute and self._command_table is not None and self._command_table.is_toggle(command):
+            # Переключающий код в уже нужном состоянии сменил бы его на обратное
+            return
+        self._is_mute = mute
+        try:
+            await self.async_send_command(command)
+            self.async_write_ha_state()  # Обновляем состояние после изменения
+        except ValueError:
+            _LOGGER.warning("%s error for %s", command, self._name)
+
+    async def async_volume_up(self):
+        """Increase the volume level."""
+        await self._async_queue_volume_step(1)
+
+    async def async_volume_down(self):
+        """Decrease the volume level."""
+        await self._async_queue_volume_step(-1)
+
+    async def _async_queue_volume_step(self, step):
+        """Collect volume steps arriving within a short window into one transmission."""
+        self._pending_volume_steps += step
+        if self._volume_flush is not None:
+            # Пачка уже собирается - ждём её отправки
+            await asyncio.shield(self._volume_flush)
+            return
+        self._volume_flush = flush = self.hass.loop.create_future()
+        try:
+            await asyncio.sleep(VOLUME_COALESCE_WINDOW)
+            # Шаги, пришедшие во время отправки, соберутся уже в следующую пачку
+            self._volume_flush = None
+            steps, self._pending_volume_steps = self._pending_volume_steps, 0
+            await self._async_send_volume_steps(steps)
+        except BaseException as err:
+            if isinstance(err, asyncio.CancelledError):
+                err = HomeAssistantError(f"Volume change for {self._name} was cancelled")
+            # Ошибку получают все нажатия пачки, а не только первое
+            flush.set_exception(err)
+            # Без ожидающих нажатий исключение никто не заберёт - помечаем его полученным
+            flush.exception()
+            raise
+        else:
+            flush.set_result(None)
+        finally:
+            if self._volume_flush is flush:
+                # Пачку отменили до отправки - её шаги не должны достаться следующему нажатию
+                self._volume_flush = None
+                self._pending_volume_steps = 0
+
+    async def _async_send_volume_steps(self, steps):
+        """Send a net number of volume steps as one repeated command."""
+        # Противоположные шаги взаимно сократились - передавать нечего
+        if steps == 0:
+            return
+        command = 'VOLUME_UP' if steps > 0 else 'VOLUME_DOWN'
+        if not await self.async_check_command_existence(command):
+            return
+        await self._async_send_commands([command], VOLUME_REPEAT_PAUSE, num_repeats=abs(steps))
+        # Уровень громкости и состояние обновляем один раз на всю пачку
+        volume_level = round(min(1.0, max(0.0, self._volume_level + steps / self._volume_steps)), 2)
+        if volume_level != self._volume_level:
+            self._volume_level = volume_level
+            self.async_write_ha_state()
+
+    async def async_set_volume_level(self, volume: float) -> None:
+        """Set the volume level by sending the computed number of steps."""
+        target_steps = round(min(1.0, max(0.0, volume)) * self._volume_steps)
+        commands = []
+        reset = self._volume_reset and (not self._volume_synced or target_steps == 0)
+        if reset:
+            # Сброс «в ноль»: после него учтённый уровень гарантированно совпадает с ТВ
+            if not await self.async_check_command_existence('VOLUME_DOWN'):
+                return
+            commands.extend(['VOLUME_DOWN'] * self._volume_steps)
+            current_steps = 0
+        else:
+            current_steps = round(self._volume_level * self._volume_steps)
+        delta = target_steps - current_steps
+        if delta:
+            command = 'VOLUME_UP' if delta > 0 else 'VOLUME_DOWN'
+            if not await self.async_check_command_existence(command):
+                return
+            commands.extend([command] * abs(delta))
+        if commands:
+            # Все нажатия уходят одной передачей с паузой между повторами
+            await self._async_send_commands(commands, VOLUME_REPEAT_PAUSE, label="VOLUME_SET")
+        if reset:
+            self._volume_synced = True
+        volume_level = round(target_steps / self._volume_steps, 2)
+        if volume_level != self._volume_level:
+            self._volume_level = volume_level
+            self.async_write_ha_state()
+
+    async def async_media_previous_track(self):
+        """Switch to the previous channel."""
+        # Отправляем команду для переключения на предыдущий канал
+        await self.async_send_command('CHANNEL_DOWN')
+        self._track_channel(self._channel_planner.step(self._current_channel, -1))
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+
+    async def async_media_next_track(self):
+        """Switch to the next channel."""
+        # Отправляем команду для переключения на следующий канал
+        await self.async_send_command('CHANNEL_UP')
+        self._track_channel(self._channel_planner.step(self._current_channel, 1))
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+
+    def _track_channel(self, channel_number):
+        """Remember the channel the TV has been switched to."""
+        if channel_number != self._current_channel:
+            self._previous_channel = self._current_channel
+            self._current_channel = channel_number
+
+    async def async_set_channel(self, channel_number):
+        """Set the TV to a specific channel (the smartify_tv.set_channel entity service)."""
+        # Переключаем канал
+        if 1 <= channel_number <= MAX_CHANNEL:
+            # Даже для учтённого текущего канала отправляем команду: его могли сменить родным пультом
+            known = self._channel_known
+            # Кнопки, которыми может воспользоваться планировщик
+            learned = {
+                key
+                for key in (*DIGIT_KEYS, "CHANNEL_UP", "CHANNEL_DOWN", "CHANNEL_RECALL")
+                if await self.async_check_command_existence(key)
+            }
+            plan = self._channel_planner.plan(
+                channel_number,
+                self._current_channel if known else None,
+                self._previous_channel if known else None,
+                learned,
+            )
+            if plan is None:
+                _LOGGER.warning("Digit keys for channel %s are not learned for %s", channel_number, self._name)
+                return
+            # Выбранная последовательность уходит одной передачей
+            await self._async_send_commands(plan.commands, plan.delay_secs, plan.num_repeats, label=plan.label)
+            self._track_channel(channel_number)
+            self._channel_known = True
+            self.async_write_ha_state()
+
+    async def async_play_media(
+        self, media_type: MediaType | str, media_id: str, **kwargs: Any
+    ) -> None:
+        """ Принимаем номер канала ТВ """
+        if media_type == MediaType.CHANNEL:
+            if not media_id.isnumeric():
+                _LOGGER.warning("Channel must be numeric:  %s", media_id)
+                return
+            await self.async_set_channel(int(media_id))
+            return
+
+        if media_type in [MediaType.URL, MediaType.APP]:
+            return
+
+        _LOGGER.warning("Invalid media type:  %s", media_type)
+
+    async def async_media_play(self) -> None:
+        """Send play command to media player."""
+				# Проверяем состояние, если выключен - выход
+        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
+        if self._state == STATE_OFF:
+            return
+        # Отправляем команду для начала/возобновления проигрывания
+        await self.async_send_command('PLAY')
+        # Set status
+        self._attr_state = MediaPlayerState.PLAYING
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+
+    async def async_media_play_pause(self) -> None:
+        """Send pause command to media player."""
+				# Проверяем состояние, если выключен - выход
+        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
+        if self._state == STATE_OFF:
+            return
+        new_command = 'PAUSE' if self._attr_state == MediaPlayerState.PLAYING else 'PLAY'
+        # Отправляем команду для приостановки воспроизведения
+        await self.async_send_command(new_command)
+        # Set status
+        if self._attr_state == MediaPlayerState.PLAYING:
+            self._attr_state = MediaPlayerState.PAUSED
+        else:
+            self._attr_state = MediaPlayerState.PLAYING
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+        _LOGGER.warning("Calling media_play_pause")
+
+    async def async_media_pause(self) -> None:
+        """Send pause command to media player."""
+				# Проверяем состояние, если выключен - выход
+        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
+        if self._state == STATE_OFF:
+            return
+        # Отправляем команду для приостановки воспроизведения
+        await self.async_send_command('PAUSE')
+        # Set status
+        self._attr_state = MediaPlayerState.PAUSED
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+
+    async def async_media_stop(self) -> None:
+        """Send stop command to media player."""
+				# Проверяем состояние, если выключен - выход
+        # Происходит потому, что нажатие кнопки при выключенном ТВ ведёт к отображению его как включенного
+        if self._state == STATE_OFF:
+            return
+        # Отправляем команду для остановки воспроизведения
+        await self.async_send_command('STOP')
+        # Set status
+        self._attr_state = MediaPlayerState.IDLE
+        # Обновляем состояние, если это необходимо
+        self.async_write_ha_state()
+        _LOGGER.warning("media_stop")
+
+#======================================================================================================
+
+    @property
+    def extra_restore_state_data(self) -> SmartifyTVExtraStoredData:
+        """Return the TV state to restore after a restart."""
+        playback = self._attr_state
+        return SmartifyTVExtraStoredData(
+            self._current_channel,
+            self._previous_channel,
+            self._channel_known,
+            self._volume_level,
+            self._volume_synced,
+            self._is_mute,
+            str(playback) if playback in _PLAYBACK_STATES else None,
+        )
+
+    async def _async_restore_state(self):
+        """Restore channel, volume, mute and playback from the last saved state."""
+        if (last_data := await self.async_get_last_extra_data()) is None:
+            return None
+        if (restored := SmartifyTVExtraStoredData.from_dict(last_data.as_dict())) is None:
+            return None
+        self._current_channel = restored.current_channel
+        self._previous_channel = restored.previous_channel
+        self._channel_known = restored.channel_known
+        self._volume_level = restored.volume_level
+        self._volume_synced = restored.volume_synced
+        self._is_mute = restored.is_mute
+        return restored.playback
+
+    async def async_added_to_hass(self):
+        """Called when entity is added to hass."""
+        await super().async_added_to_hass()
+        # Сначала - то, что с ТВ не прочитать (канал, громкость, звук); питание затем берётся
+        # из текущего показания розетки в async_initialize
+        playback = await self._async_restore_state()
+        # Отписка от розетки и пульта произойдёт при удалении сущности (в т.ч. при выгрузке записи)
+        self._subscribe()
+        self.async_on_remove(self._unsubscribe)
+        self.async_on_remove(self._cancel_backend_task)
+        self.async_on_remove(self._cancel_power_dwell)
+        # Начальная настройка: пульт, коды и текущее состояние розетки.
+        # Записи интеграции настраиваются HA параллельно, каждая - со своей сущностью
+        started = time.monotonic()
+        await self.async_initialize()
+        # Воспроизведение восстанавливаем, только если ТВ по-прежнему включён
+        if playback is not None and self._state == STATE_ON:
+            # from_dict пропускает только значения из _PLAYBACK_STATES
+            self._attr_state = MediaPlayerState(playback)
+        self._setup_time = time.monotonic() - started
+        _LOGGER.debug("%s set up in %.3f s", self._name, self._setup_time)
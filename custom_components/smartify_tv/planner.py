@@ -0,0 +1,128 @@
+"""Выбор самой быстрой последовательности кнопок для переключения канала."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Container
+from dataclasses import dataclass
+
+from .const import (
+    CHANNEL_DIGIT_PAUSE,
+    CHANNEL_KEY_TIME,
+    CHANNEL_STEP_PAUSE,
+    DEFAULT_CHANNEL_DIGIT_TIMEOUT,
+    MAX_CHANNEL,
+)
+
+DIGIT_KEYS = tuple(f"KEY_{digit}" for digit in range(10))
+
+
+@dataclass(frozen=True)
+class ChannelPlan:
+    """Key sequence switching to a channel, sent as one transmission."""
+
+    commands: list[str]
+    delay_secs: float
+    num_repeats: int
+    cost: float
+    label: str
+
+
+def parse_channel_list(text: str) -> list[int]:
+    """Parse a channel list like "1-20, 25, 100-105"; raise ValueError if it is invalid."""
+    channels = set()
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if not 1 <= start <= end <= MAX_CHANNEL:
+            raise ValueError(f"Invalid channel range: {part}")
+        channels.update(range(start, end + 1))
+    return sorted(channels)
+
+
+class ChannelPlanner:
+    """Choose between typing digits, stepping with CHANNEL_UP/DOWN and the recall key."""
+
+    def __init__(
+        self,
+        channels: list[int] | None = None,
+        digit_timeout: float = DEFAULT_CHANNEL_DIGIT_TIMEOUT,
+        key_time: float = CHANNEL_KEY_TIME,
+        digit_pause: float = CHANNEL_DIGIT_PAUSE,
+        step_pause: float = CHANNEL_STEP_PAUSE,
+    ) -> None:
+        """Initialize the planner.
+
+        Без списка каналов считаем, что каналы идут подряд от 1 до MAX_CHANNEL
+        без перехода через край; со списком CHANNEL_UP/DOWN ходят по нему по кругу.
+        Учтённый канал расходится с реальным, как только ТВ переключают родным пультом,
+        поэтому без списка каналов из относительных переходов остаётся только соседний канал.
+        """
+        self.channels = channels or None
+        self._digit_timeout = digit_timeout
+        self._key_time = key_time
+        self._digit_pause = digit_pause
+        self._step_pause = step_pause
+        # После максимального числа цифр ТВ переключается сразу, не дожидаясь таймаута
+        self._max_digits = len(str(self.channels[-1] if self.channels else MAX_CHANNEL))
+
+    def is_valid(self, channel: int) -> bool:
+        """Return True if the channel can be tuned."""
+        if self.channels is None:
+            return 1 <= channel <= MAX_CHANNEL
+        index = bisect_left(self.channels, channel)
+        return index < len(self.channels) and self.channels[index] == channel
+
+    def step(self, current: int, steps: int) -> int:
+        """Return the channel reached from current after the given number of CHANNEL_UP (negative - DOWN) presses."""
+        if self.channels is None:
+            return min(MAX_CHANNEL, max(1, current + steps))
+        if not self.is_valid(current):
+            return current
+        index = bisect_left(self.channels, current)
+        return self.channels[(index + steps) % len(self.channels)]
+
+    def _sequence_cost(self, presses: int, pause: float) -> float:
+        return presses * self._key_time + (presses - 1) * pause
+
+    def _steps_between(self, current: int, target: int) -> int | None:
+        """Return signed number of CHANNEL_UP/DOWN presses from current to target (shortest way)."""
+        if self.channels is None:
+            return target - current
+        if not (self.is_valid(current) and self.is_valid(target)):
+            return None
+        count = len(self.channels)
+        forward = (bisect_left(self.channels, target) - bisect_left(self.channels, current)) % count
+        return forward if forward <= count - forward else forward - count
+
+    def plan(
+        self,
+        target: int,
+        current: int | None,
+        previous: int | None,
+        learned: Container[str],
+    ) -> ChannelPlan | None:
+        """Return the fastest plan to tune target, or None if no learned keys can do it.
+
+        current и previous - None, если канал ТВ нам не известен (тогда доступны только цифры).
+        """
+        candidates = []
+        digits = [DIGIT_KEYS[int(digit)] for digit in str(target)]
+        if all(key in learned for key in digits):
+            cost = self._sequence_cost(len(digits), self._digit_pause)
+            if len(digits) < self._max_digits:
+                cost += self._digit_timeout
+            candidates.append(ChannelPlan(digits, self._digit_pause, 1, cost, "CHANNEL"))
+        if current is not None and current != target:
+            steps = self._steps_between(current, target)
+            key = "CHANNEL_UP" if steps and steps > 0 else "CHANNEL_DOWN"
+            if steps and key in learned and (self.channels is not None or abs(steps) == 1):
+                cost = self._sequence_cost(abs(steps), self._step_pause)
+                candidates.append(ChannelPlan([key], self._step_pause, abs(steps), cost, "CHANNEL_STEP"))
+            if self.channels is not None and previous == target and "CHANNEL_RECALL" in learned:
+                candidates.append(ChannelPlan(["CHANNEL_RECALL"], self._step_pause, 1, self._key_time, "CHANNEL_RECALL"))
+        # При равной стоимости предпочитаем цифры: они не зависят от учтённого канала
+        return min(candidates, key=lambda plan: plan.cost, default=None)
@@ -0,0 +1,79 @@
+"""Массовое добавление ТВ одним вызовом сервиса smartify_tv.provision."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, CONF_POWER_ENTITY, CONF_IR_REMOTE, ATTR_TVS
+
+_LOGGER = logging.getLogger(__name__)
+
+PROVISION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_TVS): vol.All(
+            cv.ensure_list,
+            [
+                {
+                    vol.Required(CONF_NAME): cv.string,
+                    vol.Required(CONF_POWER_ENTITY): cv.entity_id,
+                    vol.Required(CONF_IR_REMOTE): cv.entity_id,
+                }
+            ],
+        ),
+    }
+)
+
+
+async def async_provision(hass: HomeAssistant, tvs: list[dict[str, Any]]) -> dict[str, Any]:
+    """Validate, deduplicate and create config entries for many TVs at once."""
+    # Индекс существующих комплектов розетка-пульт: проверка дубликата - один поиск в set
+    known = {
+        (entry.data.get(CONF_POWER_ENTITY), entry.data.get(CONF_IR_REMOTE))
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    accepted = []
+    skipped = []
+    for tv in tvs:
+        key = (tv[CONF_POWER_ENTITY], tv[CONF_IR_REMOTE])
+        if key in known:
+            reason = "device_exists"
+        elif hass.states.get(tv[CONF_POWER_ENTITY]) is None:
+            reason = "invalid_power_entity"
+        elif hass.states.get(tv[CONF_IR_REMOTE]) is None:
+            reason = "invalid_ir_entity"
+        else:
+            # Повтор внутри того же списка тоже считается дубликатом
+            known.add(key)
+            accepted.append(tv)
+            continue
+        skipped.append({CONF_NAME: tv[CONF_NAME], "reason": reason})
+
+    # Записи создаются и настраиваются параллельно; ТВ на одном пульте делят
+    # один бэкенд и одно чтение файла кодов (кэш и блокировка на файл)
+    results = await asyncio.gather(
+        *(
+            hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_IMPORT}, data=tv)
+            for tv in accepted
+        ),
+        return_exceptions=True,
+    )
+    created = []
+    for tv, result in zip(accepted, results):
+        if isinstance(result, Exception):
+            _LOGGER.error("Failed to provision %s: %s", tv[CONF_NAME], result)
+            skipped.append({CONF_NAME: tv[CONF_NAME], "reason": "unknown"})
+        elif result["type"] != FlowResultType.CREATE_ENTRY:
+            skipped.append({CONF_NAME: tv[CONF_NAME], "reason": result.get("reason", "unknown")})
+        else:
+            created.append({CONF_NAME: tv[CONF_NAME], "entry_id": result["result"].entry_id})
+    _LOGGER.info("Provisioned %s TVs, skipped %s", len(created), len(skipped))
+    return {"created": created, "skipped": skipped}
@@ -0,0 +1,88 @@
+"""Очередь команд IR-пульта, общая для всех ТВ на этом пульте."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, DATA_SCHEDULERS, INTERCOMMAND_PAUSE
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class IRCommandScheduler:
+    """Serialize and pace transmissions of one IR remote across all TVs using it."""
+
+    def __init__(self, remote_entity_id: str, pause: float = INTERCOMMAND_PAUSE) -> None:
+        """Initialize the scheduler."""
+        self.remote_entity_id = remote_entity_id
+        self._pause = pause
+        # asyncio.Lock пропускает ожидающих строго по очереди (FIFO)
+        self._lock = asyncio.Lock()
+        self._last_end = 0.0
+        self._pending = 0
+        self._jobs = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of submitted jobs not finished yet."""
+        return self._pending
+
+    async def async_run(self, job: Callable[[], Awaitable[_T]]) -> _T:
+        """Run a transmission job in turn, keeping the pause after the previous one."""
+        self._pending += 1
+        enqueued = time.monotonic()
+        try:
+            async with self._lock:
+                # Пауза отсчитывается от окончания предыдущей передачи на этом пульте
+                delay = self._last_end + self._pause - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._record_wait(time.monotonic() - enqueued)
+                try:
+                    return await job()
+                finally:
+                    self._last_end = time.monotonic()
+        finally:
+            self._pending -= 1
+
+    def _record_wait(self, wait: float) -> None:
+        """Update wait time statistics."""
+        self._jobs += 1
+        self._total_wait += wait
+        self._last_wait = wait
+        self._max_wait = max(self._max_wait, wait)
+        if wait > self._pause:
+            _LOGGER.debug(
+                "%s: command waited %.3f s in queue (depth %s)",
+                self.remote_entity_id, wait, self._pending,
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return queue statistics."""
+        return {
+            "remote": self.remote_entity_id,
+            "queue_depth": self._pending,
+            "jobs": self._jobs,
+            "last_wait": round(self._last_wait, 3),
+            "avg_wait": round(self._total_wait / self._jobs, 3) if self._jobs else 0.0,
+            "max_wait": round(self._max_wait, 3),
+        }
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant, remote_entity_id: str) -> IRCommandScheduler:
+    """Return the scheduler of an IR remote, creating it on first use."""
+    schedulers: dict[str, IRCommandScheduler] = hass.data[DOMAIN].setdefault(DATA_SCHEDULERS, {})
+    if (scheduler := schedulers.get(remote_entity_id)) is None:
+        scheduler = schedulers[remote_entity_id] = IRCommandScheduler(remote_entity_id)
+    return scheduler
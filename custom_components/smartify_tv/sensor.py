@@ -0,0 +1,81 @@
+"""Diagnostic sensors of SmartifyTV command statistics."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, DEFAULT_NAME, DATA_STATS
+from .stats import CommandStats
+
+# Сенсоры статистики опрашиваются раз в минуту, чтобы не писать состояние на каждую команду
+SCAN_INTERVAL = timedelta(seconds=60)
+
+# ключ -> (название, единица измерения, класс состояния, функция получения значения)
+STATS_SENSORS: dict[str, tuple[str, str | None, SensorStateClass, Callable[[CommandStats], float | int]]] = {
+    "command_latency": (
+        "Command latency",
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+        lambda stats: round(stats.all_latency.mean * 1000, 1),
+    ),
+    "pacing_wait": (
+        "Remote queue wait",
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+        lambda stats: round(stats.pacing.mean * 1000, 1),
+    ),
+    # Счётчики только растут (сбрасываются при перезапуске) - для долгосрочной статистики это TOTAL_INCREASING
+    "commands_sent": (
+        "Commands sent",
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+        lambda stats: sum(stats.sent.values()),
+    ),
+    "commands_failed": (
+        "Commands failed",
+        None,
+        SensorStateClass.TOTAL_INCREASING,
+        lambda stats: sum(stats.failed.values()),
+    ),
+    "state_writes_per_minute": (
+        "State writes per minute",
+        None,
+        SensorStateClass.MEASUREMENT,
+        lambda stats: stats.state_writes_per_minute,
+    ),
+}
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    """Set up diagnostic sensors if instrumentation is enabled."""
+    stats: CommandStats = hass.data[DOMAIN][entry.entry_id][DATA_STATS]
+    if not stats.enabled:
+        return
+    async_add_entities(
+        [SmartifyTVStatsSensor(entry, stats, key) for key in STATS_SENSORS],
+        update_before_add=True,
+    )
+
+
+class SmartifyTVStatsSensor(SensorEntity):
+    """Sensor exposing one command statistics value of a TV."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, config_entry: ConfigEntry, stats: CommandStats, key: str) -> None:
+        """Initialize the sensor."""
+        name, unit, self._attr_state_class, self._value_fn = STATS_SENSORS[key]
+        self._stats = stats
+        self._attr_name = f"{config_entry.data.get(CONF_NAME, DEFAULT_NAME)} {name}"
+        self._attr_unique_id = f"{config_entry.data.get('unique_id')}_{key}"
+        self._attr_native_unit_of_measurement = unit
+
+    async def async_update(self) -> None:
+        """Read the current value from the statistics."""
+        self._attr_native_value = self._value_fn(self._stats)
@@ -0,0 +1,25 @@
+"""Сервисы домена SmartifyTV (не привязанные к одной сущности)."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+
+from .broadcast import BROADCAST_SCHEMA, async_broadcast
+from .const import DOMAIN, SERVICE_PROVISION, SERVICE_BROADCAST, ATTR_TVS
+from .provisioning import PROVISION_SCHEMA, async_provision
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration-level services."""
+
+    async def _async_provision(call: ServiceCall) -> ServiceResponse:
+        return await async_provision(hass, call.data[ATTR_TVS])
+
+    async def _async_broadcast(call: ServiceCall) -> ServiceResponse:
+        return await async_broadcast(hass, call.data)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROVISION, _async_provision, PROVISION_SCHEMA, SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BROADCAST, _async_broadcast, BROADCAST_SCHEMA, SupportsResponse.OPTIONAL
+    )
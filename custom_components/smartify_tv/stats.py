@@ -0,0 +1,118 @@
+"""Счётчики и гистограммы задержек команд SmartifyTV."""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+# Верхние границы корзин гистограммы задержек, сек (последняя корзина - всё, что больше)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Окно подсчёта записей состояния, сек
+STATE_WRITE_WINDOW = 60
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a measurement."""
+        index = 0
+        while index < len(LATENCY_BUCKETS) and value > LATENCY_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean value."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as a dict."""
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "max": round(self.max, 4),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class CommandStats:
+    """Per-TV command and state instrumentation; does nothing when disabled."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize the counters."""
+        self.enabled = enabled
+        self.sent: dict[str, int] = {}
+        self.failed: dict[str, int] = {}
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.pacing = LatencyHistogram()  # Ожидание своей очереди на пульте
+        self.all_latency = LatencyHistogram()
+        self.power_events = 0
+        self.state_writes = 0
+        self._recent_writes: deque[float] = deque()
+
+    def record_command(self, label: str, latency: float, wait: float, ok: bool) -> None:
+        """Record one transmission: total latency, time spent waiting for the remote and the result."""
+        if not self.enabled:
+            return
+        if ok:
+            self.sent[label] = self.sent.get(label, 0) + 1
+        else:
+            self.failed[label] = self.failed.get(label, 0) + 1
+        if (histogram := self.latency.get(label)) is None:
+            histogram = self.latency[label] = LatencyHistogram()
+        histogram.observe(latency)
+        self.all_latency.observe(latency)
+        self.pacing.observe(wait)
+
+    def record_power_event(self) -> None:
+        """Record a power sensor or IR remote state change handled by the TV."""
+        if self.enabled:
+            self.power_events += 1
+
+    def record_state_write(self) -> None:
+        """Record a state write of the TV entity."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self.state_writes += 1
+        self._recent_writes.append(now)
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._recent_writes and self._recent_writes[0] < now - STATE_WRITE_WINDOW:
+            self._recent_writes.popleft()
+
+    @property
+    def state_writes_per_minute(self) -> int:
+        """Return the number of state writes during the last minute."""
+        self._trim(time.monotonic())
+        return len(self._recent_writes) * 60 // STATE_WRITE_WINDOW
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all counters."""
+        return {
+            "enabled": self.enabled,
+            "sent": dict(self.sent),
+            "failed": dict(self.failed),
+            "latency": self.all_latency.as_dict(),
+            "latency_by_command": {label: histogram.as_dict() for label, histogram in self.latency.items()},
+            "pacing_wait": self.pacing.as_dict(),
+            "power_events": self.power_events,
+            "state_writes": self.state_writes,
+            "state_writes_per_minute": self.state_writes_per_minute,
+        }
@@ -0,0 +1,132 @@
+"""Прямая отправка IR-пакетов на Broadlink, минуя шину сервисов."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_registry import async_get
+
+from .const import DOMAIN, DATA_TRANSPORTS, DIRECT_TIMEOUT, DIRECT_RETRIES
+
+_LOGGER = logging.getLogger(__name__)
+
+# Порт управления устройств Broadlink
+BROADLINK_PORT = 80
+
+
+class TransportError(HomeAssistantError):
+    """Error to indicate a direct transmission has failed."""
+
+    def __init__(self, message: str, sent: int = 0) -> None:
+        super().__init__(message)
+        # Сколько пакетов успело уйти до ошибки
+        self.sent = sent
+
+
+class BroadlinkTransport:
+    """Persistent authenticated session with one Broadlink blaster."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: tuple[str, int],
+        mac: bytes,
+        devtype: int,
+        timeout: float = DIRECT_TIMEOUT,
+        retries: int = DIRECT_RETRIES,
+    ) -> None:
+        """Initialize the transport."""
+        self._hass = hass
+        self.host = host
+        self._mac = mac
+        self._devtype = devtype
+        self._timeout = timeout
+        self._retries = retries
+        self._device = None
+
+    def _connect(self) -> None:
+        """Create and authenticate the device session (runs in the executor)."""
+        # Библиотека нужна только для прямой отправки - импортируем её при первом подключении
+        import broadlink  # pylint: disable=import-outside-toplevel
+
+        device = broadlink.gendevice(self._devtype, self.host, self._mac)
+        device.timeout = self._timeout
+        device.auth()
+        self._device = device
+        _LOGGER.debug("Connected to Broadlink device %s:%s", *self.host)
+
+    def _send_packet(self, packet: bytes) -> None:
+        """Send one IR packet, reconnecting and retrying only while it surely was not sent (runs in the executor)."""
+        # pylint: disable-next=import-outside-toplevel
+        from broadlink.exceptions import AuthenticationError, BroadlinkException
+
+        last_error: Exception | None = None
+        for _attempt in range(self._retries + 1):
+            if self._device is None:
+                try:
+                    self._connect()
+                except (BroadlinkException, OSError) as err:
+                    # Пакет ещё не отправлялся - можно пробовать снова
+                    last_error = err
+                    continue
+            try:
+                # Таймаут и повторная отправка UDP внутри попытки - на стороне библиотеки
+                self._device.send_data(packet)
+                return
+            except AuthenticationError as err:
+                # Пульт отверг протухшую сессию (например, после перезагрузки) и код не передал -
+                # переподключаемся и повторяем
+                self._device = None
+                last_error = err
+            except (BroadlinkException, OSError) as err:
+                # Таймаут или ошибка после отправки: пульт мог уже передать код, и повтор
+                # продублировал бы нажатие (а переключающий код вернул бы ТВ обратно)
+                self._device = None
+                raise TransportError(f"IR packet to {self.host[0]} may have been sent: {err}", sent=1) from err
+        raise TransportError(f"Failed to connect to {self.host[0]}: {last_error}")
+
+    async def async_send(
+        self, packets: list[bytes], delay_secs: float = 0, num_repeats: int = 1
+    ) -> None:
+        """Send packets with a pause between them, repeating the sequence."""
+        sent = 0
+        for repeat in range(num_repeats):
+            for index, packet in enumerate(packets):
+                if repeat or index:
+                    await asyncio.sleep(delay_secs)
+                try:
+                    await self._hass.async_add_executor_job(self._send_packet, packet)
+                except TransportError as err:
+                    # Пакет, который мог уйти, считается отправленным - повторять его нельзя
+                    raise TransportError(str(err), sent + err.sent) from err
+                sent += 1
+
+
+@callback
+def async_get_transport(hass: HomeAssistant, remote_entity_id: str) -> BroadlinkTransport | None:
+    """Return the direct transport of a Broadlink remote entity, or None if it cannot be resolved."""
+    transports: dict[str, BroadlinkTransport] = hass.data[DOMAIN].setdefault(DATA_TRANSPORTS, {})
+    if (transport := transports.get(remote_entity_id)) is not None:
+        return transport
+    # Адрес пульта берём из записи интеграции Broadlink, к которой относится сущность
+    registry_entry = async_get(hass).async_get(remote_entity_id)
+    if registry_entry is None or registry_entry.platform != "broadlink":
+        return None
+    config_entry = hass.config_entries.async_get_entry(registry_entry.config_entry_id)
+    if config_entry is None:
+        return None
+    try:
+        transport = BroadlinkTransport(
+            hass,
+            (config_entry.data["host"], BROADLINK_PORT),
+            bytes.fromhex(config_entry.data["mac"]),
+            config_entry.data["type"],
+            config_entry.data.get("timeout", DIRECT_TIMEOUT),
+        )
+    except (KeyError, TypeError, ValueError) as err:
+        _LOGGER.warning("Cannot resolve Broadlink device of %s: %s", remote_entity_id, err)
+        return None
+    transports[remote_entity_id] = transport
+    return transport
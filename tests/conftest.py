@@ -0,0 +1,81 @@
+"""Общие фикстуры: ТВ SmartifyTV на лёгкой замене ядра из benchmarks/fake_hass.py."""
+from __future__ import annotations
+
+import base64
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+import pytest_asyncio
+
+from benchmarks import fake_hass
+from custom_components.smartify_tv import media_player
+from custom_components.smartify_tv.const import (
+    COMMAND_NAMES,
+    CONF_IR_REMOTE,
+    CONF_POWER_ENTITY,
+    DOMAIN,
+    DATA_STATS,
+)
+from custom_components.smartify_tv.stats import CommandStats
+
+REMOTE = "remote.blaster"
+REMOTE_MAC = "34ea34000001"
+POWER = "sensor.tv_power"
+TV = "media_player.tv"
+UNIQUE_ID = f"{DOMAIN}_test"
+
+
+@pytest.fixture
+def sent() -> list[dict[str, Any]]:
+    """Return the remote.send_command calls made by the TVs."""
+    return []
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path, sent):
+    """Return a fake core with a Broadlink remote that records sent commands."""
+    fake_hass.install()
+    hass = fake_hass.FakeHass(str(tmp_path))
+
+    async def _send_command(data: dict[str, Any]) -> None:
+        sent.append(data)
+
+    hass.services.async_register("remote", "send_command", _send_command)
+    hass.entity_registry.add(REMOTE, "broadlink", REMOTE_MAC)
+    hass.states.async_set(REMOTE, "on")
+    return hass
+
+
+def write_codes(hass, unique_id: str, commands) -> None:
+    """Add learned commands of a device to the Broadlink codes file of the remote."""
+    path = Path(hass.config.path(".storage", f"broadlink_remote_{REMOTE_MAC}_codes"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.loads(path.read_text())["data"] if path.exists() else {}
+    data[unique_id] = {command: base64.b64encode(command.encode()).decode() for command in commands}
+    path.write_text(json.dumps({"version": 1, "key": path.name, "data": data}))
+
+
+@pytest.fixture
+def make_tv(hass):
+    """Return a factory adding a SmartifyTV media player with learned codes."""
+
+    async def _make_tv(
+        power: str = "0", options: dict[str, Any] | None = None, commands=COMMAND_NAMES
+    ) -> media_player.SmartifyTVMediaPlayer:
+        write_codes(hass, UNIQUE_ID, commands)
+        hass.states.async_set(POWER, power)
+        entry = hass.config_entries.add(
+            "entry_test",
+            DOMAIN,
+            {"name": "TV", "unique_id": UNIQUE_ID, CONF_POWER_ENTITY: POWER, CONF_IR_REMOTE: REMOTE},
+            options,
+        )
+        hass.data[DOMAIN][entry.entry_id] = {DATA_STATS: CommandStats(False)}
+        entity = media_player.SmartifyTVMediaPlayer(hass, entry)
+        fake_hass.add_entity(hass, entity, TV)
+        await entity.async_added_to_hass()
+        return entity
+
+    return _make_tv
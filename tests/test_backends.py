@@ -0,0 +1,38 @@
+"""Тесты выбора бэкенда IR-пульта (custom_components/smartify_tv/backends.py)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from conftest import REMOTE, REMOTE_MAC
+
+from custom_components.smartify_tv.const import DATA_BACKENDS, DOMAIN
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_backend_resolved_when_remote_appears(hass, make_tv, caplog):
+    """A remote missing from the registry at setup is resolved once it comes up."""
+    # Пульт ещё не загрузился: нет ни записи в реестре, ни состояния
+    hass.entity_registry._entries.pop(REMOTE)
+    hass.states.async_set(REMOTE, "unavailable")
+    tv = await make_tv()
+    assert "not in the entity registry" in caplog.text
+    assert not tv._backend.resolved
+    assert tv.extra_state_attributes["ir_platform"] is None
+
+    hass.entity_registry.add(REMOTE, "broadlink", REMOTE_MAC)
+    hass.states.async_set(REMOTE, "on")
+    await asyncio.sleep(0.01)
+    assert tv._backend.resolved
+    assert tv._backend.platform == "broadlink"
+    assert await tv.async_check_command_existence("POWER_ON")
+    assert hass.states.get(tv.entity_id).attributes["ir_platform"] == "broadlink"
+
+
+async def test_resolved_backend_is_shared(hass, make_tv):
+    """A backend found in the registry is cached for all TVs on the remote."""
+    tv = await make_tv()
+    assert tv._backend.resolved
+    assert hass.data[DOMAIN][DATA_BACKENDS][REMOTE] is tv._backend
@@ -0,0 +1,81 @@
+"""Тесты кэша файлов кодов Broadlink (custom_components/smartify_tv/code_store.py)."""
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from conftest import REMOTE_MAC, write_codes
+
+from custom_components.smartify_tv import code_store
+from custom_components.smartify_tv.code_store import BroadlinkCodeStore
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def path(hass) -> str:
+    """Return the codes file of the test remote with a TV and a foreign device."""
+    write_codes(hass, "smartify_tv_a", ["POWER_ON", "VOLUME_UP"])
+    write_codes(hass, "air_conditioner", ["COOL", "HEAT"])
+    return hass.config.path(".storage", f"broadlink_remote_{REMOTE_MAC}_codes")
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list[frozenset[str]]:
+    """Record the devices taken from the file on every parse."""
+    calls = []
+    load_codes = code_store._load_codes
+
+    def _load_codes(path, devices):
+        calls.append(devices)
+        return load_codes(path, devices)
+
+    monkeypatch.setattr(code_store, "_load_codes", _load_codes)
+    return calls
+
+
+async def test_only_requested_devices_are_kept(hass, path, loads):
+    """Foreign devices in the file are neither decoded nor cached."""
+    store = BroadlinkCodeStore(hass)
+    table = await store.async_get_command_table(path, "smartify_tv_a")
+    assert sorted(table) == ["POWER_ON", "VOLUME_UP"]
+    assert await store.async_get_command_table(path, "smartify_tv_missing") is None
+    assert {device for _, device in store._tables} == {"smartify_tv_a", "smartify_tv_missing"}
+    assert all("air_conditioner" not in devices for devices in loads)
+
+
+async def test_file_parsed_once_for_all_tvs(hass, path, loads):
+    """Tables of all SmartifyTV TVs come from one parse while the file is unchanged."""
+    write_codes(hass, "smartify_tv_b", ["POWER_ON"])
+    hass.config_entries.add("entry_b", "smartify_tv", {"unique_id": "smartify_tv_b"})
+    store = BroadlinkCodeStore(hass)
+    first, second = await asyncio.gather(
+        store.async_get_command_table(path, "smartify_tv_a"),
+        store.async_get_command_table(path, "smartify_tv_b"),
+    )
+    assert await store.async_get_command_table(path, "smartify_tv_a") is first
+    assert sorted(second) == ["POWER_ON"]
+    assert len(loads) == 1
+
+
+async def test_changed_file_is_reread(hass, path, loads):
+    """A new mtime or size re-reads the file; a deleted file drops the tables."""
+    store = BroadlinkCodeStore(hass)
+    await store.async_get_command_table(path, "smartify_tv_a")
+    write_codes(hass, "smartify_tv_a", ["POWER_ON", "VOLUME_UP", "MUTE"])
+    assert "MUTE" in await store.async_get_command_table(path, "smartify_tv_a")
+    assert len(loads) == 2
+    os.remove(path)
+    assert await store.async_get_command_table(path, "smartify_tv_a") is None
+    assert store._tables == {}
+
+
+async def test_broken_file_keeps_previous_table(hass, path):
+    """A file caught mid-write leaves the previously parsed table in use."""
+    store = BroadlinkCodeStore(hass)
+    table = await store.async_get_command_table(path, "smartify_tv_a")
+    Path(path).write_text("{broken")
+    assert await store.async_get_command_table(path, "smartify_tv_a") is table
@@ -0,0 +1,196 @@
+"""Тесты разбора библиотек IR-кодов (custom_components/smartify_tv/ircodes.py)."""
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+from custom_components.smartify_tv.ircodes import (
+    BROADLINK_TICK,
+    FORMAT_LIRC,
+    FORMAT_PRONTO,
+    FORMAT_SMARTIR,
+    parse_library,
+    pronto_to_pulses,
+    pulses_to_broadlink,
+)
+
+# Learned Pronto: несущая 0x6D, две пары импульс/пауза
+PRONTO_POWER = "0000 006D 0002 0000 0157 00AB 0015 0040"
+PRONTO_VOLUME_UP = "0000 006D 0002 0000 0157 00AB 0015 0015"
+
+
+def _durations(packet: bytes) -> list[int]:
+    """Decode the tick durations of a Broadlink IR packet."""
+    assert packet[0] == 0x26
+    length = int.from_bytes(packet[2:4], "little")
+    data = packet[4:4 + length]
+    ticks = []
+    index = 0
+    while index < len(data):
+        if data[index] == 0:
+            ticks.append(int.from_bytes(data[index + 1:index + 3], "big"))
+            index += 3
+        else:
+            ticks.append(data[index])
+            index += 1
+    return ticks
+
+
+def test_pulses_to_broadlink_long_durations():
+    """Durations over 255 ticks are written as 0x00 and two big-endian bytes."""
+    assert pulses_to_broadlink([9000, 4500, 560]) == bytes.fromhex("2600050000011289" "11")
+
+
+def test_pronto_to_pulses():
+    """Pronto words are converted with the carrier period."""
+    pulses = pronto_to_pulses(PRONTO_POWER)
+    assert len(pulses) == 4
+    assert pulses[0] == pytest.approx(0x157 * 0x6D * 0.241246)
+
+
+def test_pronto_rejects_non_learned_code():
+    """Only learned (0000) Pronto codes are supported."""
+    with pytest.raises(ValueError):
+        pronto_to_pulses("0100 006D 0002 0000 0157 00AB 0015 0040")
+
+
+def test_pronto_json_and_toggles():
+    """A power key fills POWER_ON and POWER_OFF and both are marked as toggles."""
+    packets, toggles = parse_library(
+        FORMAT_PRONTO, json.dumps({"power": PRONTO_POWER, "Volume Up": PRONTO_VOLUME_UP})
+    )
+    assert set(packets) == {"POWER_ON", "POWER_OFF", "VOLUME_UP"}
+    assert packets["POWER_ON"] == packets["POWER_OFF"]
+    assert toggles == {"POWER_ON", "POWER_OFF"}
+    assert _durations(packets["VOLUME_UP"])[0] == int(0x157 * 0x6D * 0.241246 // BROADLINK_TICK)
+
+
+def test_pronto_lines_with_discrete_codes():
+    """Separate on/off keys are not toggles; comments and blank lines are skipped."""
+    text = f"# TV\nKEY_POWERON: {PRONTO_POWER}\n\nKEY_POWEROFF {PRONTO_VOLUME_UP}\n"
+    packets, toggles = parse_library(FORMAT_PRONTO, text)
+    assert set(packets) == {"POWER_ON", "POWER_OFF"}
+    assert packets["POWER_ON"] != packets["POWER_OFF"]
+    assert toggles == set()
+
+
+@pytest.mark.parametrize("text", ['{"power": 5}', '{"power": null}', "5", "power: zzzz"])
+def test_pronto_invalid_values(text):
+    """Wrong value types and broken lines raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_library(FORMAT_PRONTO, text)
+
+
+@pytest.mark.parametrize("name", ["Previous Channel", "PREV_CHANNEL", "last", "recall"])
+def test_previous_channel_is_recall(name):
+    """Every spelling of the previous-channel key maps to CHANNEL_RECALL, not CHANNEL_DOWN."""
+    packets, _ = parse_library(FORMAT_PRONTO, json.dumps({name: PRONTO_POWER}))
+    assert set(packets) == {"CHANNEL_RECALL"}
+
+
+def test_mapping_overrides_names():
+    """The mapping takes library names to SmartifyTV commands."""
+    packets, _ = parse_library(FORMAT_PRONTO, json.dumps({"tv_in": PRONTO_POWER}), {"TV_IN": "SOURCE"})
+    assert set(packets) == {"SOURCE"}
+
+
+LIRC_SPACE_ENC = """
+begin remote
+  name  TV
+  bits           16
+  flags SPACE_ENC|CONST_LENGTH
+  header       9000  4500
+  one           560  1690
+  zero          560   560
+  ptrail        560
+  pre_data_bits   16
+  pre_data       0x20DF
+  gap          108000
+  begin codes
+    KEY_POWER                0x10EF
+    KEY_VOLUMEUP             0x40BF
+  end codes
+end remote
+"""
+
+LIRC_RAW = """
+begin remote
+  name  TV
+  flags RAW_CODES
+  gap 50000
+  begin raw_codes
+    name KEY_MUTE
+      9000 4500 560
+      560
+    name KEY_0
+      9000 2250 560
+  end raw_codes
+end remote
+"""
+
+
+def test_lirc_space_enc():
+    """Header, pre_data, code bits, trailing pulse and gap are encoded."""
+    packets, toggles = parse_library(FORMAT_LIRC, LIRC_SPACE_ENC)
+    assert set(packets) == {"POWER_ON", "POWER_OFF", "VOLUME_UP"}
+    assert toggles == {"POWER_ON", "POWER_OFF"}
+    # header(2) + 32 бита по 2 интервала + ptrail + gap
+    assert len(_durations(packets["VOLUME_UP"])) == 2 + 64 + 1 + 1
+
+
+def test_lirc_raw_codes():
+    """Raw codes spanning several lines are joined; an odd count gets the gap."""
+    packets, toggles = parse_library(FORMAT_LIRC, LIRC_RAW)
+    assert set(packets) == {"MUTE", "UNMUTE", "KEY_0"}
+    assert toggles == {"MUTE", "UNMUTE"}
+    assert len(_durations(packets["MUTE"])) == 4
+    assert len(_durations(packets["KEY_0"])) == 4
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        LIRC_SPACE_ENC.replace("SPACE_ENC|CONST_LENGTH", "RC5"),
+        LIRC_SPACE_ENC.replace("0x10EF", ""),
+        "begin remote\nend remote\n",
+    ],
+)
+def test_lirc_invalid(text):
+    """Unsupported encodings, codes without a value and empty configs raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_library(FORMAT_LIRC, text)
+
+
+def test_smartir_base64_nested():
+    """Nested SmartIR groups are flattened into normalized command names."""
+    code = base64.b64encode(pulses_to_broadlink([9000, 4500, 560])).decode()
+    data = {"commandsEncoding": "Base64", "commands": {"off": code, "sources": {"HDMI 1": code}}}
+    packets, toggles = parse_library(FORMAT_SMARTIR, json.dumps(data))
+    assert set(packets) == {"POWER_OFF", "SOURCES_HDMI_1"}
+    assert packets["POWER_OFF"] == base64.b64decode(code)
+    assert toggles == set()
+
+
+def test_smartir_pronto():
+    """SmartIR files with Pronto codes are converted to Broadlink packets."""
+    data = {"commandsEncoding": "Pronto", "commands": {"on": PRONTO_POWER}}
+    packets, _ = parse_library(FORMAT_SMARTIR, json.dumps(data))
+    assert packets["POWER_ON"] == pulses_to_broadlink(pronto_to_pulses(PRONTO_POWER))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"commandsEncoding": "Base64", "commands": {"power": 5}},
+        {"commandsEncoding": "Base64", "commands": {"power": "not base64!"}},
+        {"commandsEncoding": "Raw", "commands": {"power": "x"}},
+        {"commands": []},
+        [],
+    ],
+)
+def test_smartir_invalid(data):
+    """Wrong value types, bad codes, unknown encodings and missing commands raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_library(FORMAT_SMARTIR, json.dumps(data))
@@ -0,0 +1,85 @@
+"""Тесты макросов (custom_components/smartify_tv/macros.py)."""
+from __future__ import annotations
+
+import pytest
+import voluptuous as vol
+
+from custom_components.smartify_tv.const import ATTR_COMMAND, ATTR_DELAY, ATTR_REPEAT, INTERCOMMAND_PAUSE
+from custom_components.smartify_tv.macros import MacroSegment, compile_macro, normalize_steps
+
+
+def test_normalize_fills_defaults():
+    """Plain names and partial dicts get repeat 1 and the default pause."""
+    assert normalize_steps(["SOURCE", {"command": "DOWN", "repeat": "2", "delay": 1}]) == [
+        {ATTR_COMMAND: "SOURCE", ATTR_REPEAT: 1, ATTR_DELAY: INTERCOMMAND_PAUSE},
+        {ATTR_COMMAND: "DOWN", ATTR_REPEAT: 2, ATTR_DELAY: 1.0},
+    ]
+
+
+def test_normalize_accepts_single_step():
+    """A single command is taken as a one-step macro."""
+    assert normalize_steps("MUTE") == [{ATTR_COMMAND: "MUTE", ATTR_REPEAT: 1, ATTR_DELAY: INTERCOMMAND_PAUSE}]
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [],
+        [{"repeat": 2}],
+        [{"command": "UP", "repeat": 0}],
+        [{"command": "UP", "repeat": 51}],
+        [{"command": "UP", "delay": -1}],
+        [{"command": "UP", "delay": 11}],
+        [{"command": "UP", "unknown": 1}],
+    ],
+)
+def test_normalize_invalid(steps):
+    """Empty macros, missing commands and out-of-range values raise vol.Invalid."""
+    with pytest.raises(vol.Invalid):
+        normalize_steps(steps)
+
+
+def test_same_pause_is_one_transmission():
+    """Presses with the same pause go out as one transmission."""
+    assert compile_macro(normalize_steps(["SOURCE", "DOWN", "OK"])) == [
+        MacroSegment(["SOURCE", "DOWN", "OK"], INTERCOMMAND_PAUSE, 1, 0.0)
+    ]
+
+
+def test_repeated_key_uses_num_repeats():
+    """One key pressed several times becomes num_repeats."""
+    assert compile_macro(normalize_steps([{"command": "DOWN", "repeat": 3, "delay": 0.2}])) == [
+        MacroSegment(["DOWN"], 0.2, 3, 0.0)
+    ]
+
+
+def _timeline(segments):
+    """Return (command, pause after it) for every press of the compiled macro."""
+    presses = []
+    for segment in segments:
+        codes = segment.commands * segment.num_repeats
+        presses += [(command, segment.delay_secs) for command in codes[:-1]]
+        presses.append((codes[-1], segment.pause_after))
+    return presses
+
+
+def test_different_pause_splits_transmissions():
+    """A change of pause ends the transmission; every pause between presses is kept."""
+    steps = normalize_steps(
+        [
+            {"command": "SOURCE", "delay": 2},
+            {"command": "DOWN", "repeat": 2, "delay": 0.2},
+            "OK",
+        ]
+    )
+    segments = compile_macro(steps)
+    assert segments == [
+        MacroSegment(["SOURCE", "DOWN"], 2.0, 1, 0.2),
+        MacroSegment(["DOWN", "OK"], 0.2, 1, 0.0),
+    ]
+    assert _timeline(segments) == [("SOURCE", 2.0), ("DOWN", 0.2), ("DOWN", 0.2), ("OK", 0.0)]
+
+
+def test_single_step_macro():
+    """A one-press macro is a single transmission without pauses."""
+    assert compile_macro(normalize_steps(["POWER_ON"])) == [MacroSegment(["POWER_ON"], 0.0, 1, 0.0)]
@@ -0,0 +1,86 @@
+"""Тесты выбора кнопок для переключения канала (custom_components/smartify_tv/planner.py)."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.smartify_tv.planner import DIGIT_KEYS, ChannelPlanner, parse_channel_list
+
+ALL_KEYS = {*DIGIT_KEYS, "CHANNEL_UP", "CHANNEL_DOWN", "CHANNEL_RECALL"}
+CHANNELS = list(range(1, 21))
+
+
+def test_unknown_channel_uses_digits():
+    """Without a known current channel only digits can tune the target."""
+    plan = ChannelPlanner().plan(25, None, None, ALL_KEYS)
+    assert plan.label == "CHANNEL"
+    assert plan.commands == ["KEY_2", "KEY_5"]
+    assert plan.num_repeats == 1
+
+
+def test_adjacent_channel_steps_without_list():
+    """The neighbouring channel is one CHANNEL_UP/DOWN press, faster than digits with the timeout."""
+    planner = ChannelPlanner()
+    assert planner.plan(6, 5, None, ALL_KEYS).commands == ["CHANNEL_UP"]
+    assert planner.plan(4, 5, None, ALL_KEYS).commands == ["CHANNEL_DOWN"]
+
+
+def test_no_multi_step_or_recall_without_list():
+    """Without a channel list the tracked channel may be stale, so only one step is trusted."""
+    planner = ChannelPlanner()
+    assert planner.plan(8, 5, None, ALL_KEYS).label == "CHANNEL"
+    assert planner.plan(8, 5, 8, ALL_KEYS).label == "CHANNEL"
+
+
+def test_multi_step_with_list():
+    """With a channel list several steps are used when they are faster than digits."""
+    plan = ChannelPlanner(CHANNELS).plan(8, 5, None, ALL_KEYS)
+    assert plan.label == "CHANNEL_STEP"
+    assert (plan.commands, plan.num_repeats) == (["CHANNEL_UP"], 3)
+
+
+def test_digits_beat_long_stepping():
+    """A full-length number is typed without the timeout and beats many steps."""
+    plan = ChannelPlanner(CHANNELS).plan(15, 5, None, ALL_KEYS)
+    assert plan.commands == ["KEY_1", "KEY_5"]
+
+
+def test_steps_wrap_around_the_list():
+    """Stepping goes round the list the shortest way."""
+    plan = ChannelPlanner(CHANNELS).plan(1, 20, None, ALL_KEYS)
+    assert (plan.commands, plan.num_repeats) == (["CHANNEL_UP"], 1)
+    plan = ChannelPlanner(CHANNELS).plan(19, 1, None, {"CHANNEL_UP", "CHANNEL_DOWN"})
+    assert (plan.commands, plan.num_repeats) == (["CHANNEL_DOWN"], 2)
+
+
+def test_recall_returns_to_previous_channel():
+    """CHANNEL_RECALL is used when the target is the previous channel."""
+    plan = ChannelPlanner(CHANNELS).plan(12, 5, 12, ALL_KEYS)
+    assert plan.label == "CHANNEL_RECALL"
+    assert plan.commands == ["CHANNEL_RECALL"]
+
+
+def test_only_learned_keys_are_used():
+    """Missing keys rule out their plans; with nothing usable there is no plan."""
+    planner = ChannelPlanner(CHANNELS)
+    assert planner.plan(8, 5, None, set(DIGIT_KEYS)).label == "CHANNEL"
+    assert planner.plan(12, 5, 12, ALL_KEYS - {"CHANNEL_RECALL"}).label == "CHANNEL"
+    assert planner.plan(12, None, None, {"CHANNEL_UP", "CHANNEL_DOWN"}) is None
+
+
+def test_step_tracks_channel():
+    """step() follows the list round, or clamps to 1..MAX_CHANNEL without it."""
+    assert ChannelPlanner(CHANNELS).step(20, 1) == 1
+    assert ChannelPlanner().step(1, -1) == 1
+
+
+def test_parse_channel_list():
+    """Ranges and single channels are merged and sorted."""
+    assert parse_channel_list("10-12; 1, 3") == [1, 3, 10, 11, 12]
+    assert parse_channel_list("") == []
+
+
+@pytest.mark.parametrize("text", ["5-3", "0", "1-1000", "a"])
+def test_parse_channel_list_invalid(text):
+    """Reversed, out of range and non-numeric entries raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_channel_list(text)
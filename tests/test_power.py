@@ -0,0 +1,90 @@
+"""Тесты состояния питания по розетке: гистерезис и выдержка (SmartifyTVMediaPlayer)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from homeassistant.components.media_player import MediaPlayerState
+
+from custom_components.smartify_tv.const import CONF_POWER_DWELL, CONF_POWER_OFF_THRESHOLD, CONF_POWER_ON_THRESHOLD
+
+from conftest import POWER
+
+pytestmark = pytest.mark.asyncio
+
+DWELL = 0.05
+OPTIONS = {CONF_POWER_ON_THRESHOLD: 10, CONF_POWER_OFF_THRESHOLD: 5, CONF_POWER_DWELL: DWELL}
+
+
+async def test_initial_reading_is_applied_without_dwell(make_tv):
+    """The reading at startup sets the state at once."""
+    tv = await make_tv(power="50", options=OPTIONS)
+    assert tv.state == MediaPlayerState.ON
+
+
+async def test_hysteresis_band_keeps_state(hass, make_tv):
+    """Readings between the thresholds change nothing in either direction."""
+    tv = await make_tv(power="50", options=OPTIONS)
+    hass.states.async_set(POWER, "7")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.ON
+
+    hass.states.async_set(POWER, "0")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.OFF
+    hass.states.async_set(POWER, "7")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.OFF
+
+
+async def test_thresholds_are_exclusive_on_and_inclusive_off(hass, make_tv):
+    """The TV is on above the on threshold and off at or below the off threshold."""
+    tv = await make_tv(power="10", options=OPTIONS)
+    assert tv.state == MediaPlayerState.OFF
+    hass.states.async_set(POWER, "10.1")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.ON
+    hass.states.async_set(POWER, "5")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.OFF
+
+
+async def test_change_waits_for_dwell(hass, make_tv):
+    """A new state is taken only after it has held for the dwell time."""
+    tv = await make_tv(power="0", options=OPTIONS)
+    hass.states.async_set(POWER, "50")
+    assert tv.state == MediaPlayerState.OFF
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.ON
+
+
+async def test_spike_shorter_than_dwell_is_ignored(hass, make_tv):
+    """A reading that drops back before the dwell ends does not switch the state."""
+    tv = await make_tv(power="0", options=OPTIONS)
+    writes = hass.states.writes[tv.entity_id]
+    hass.states.async_set(POWER, "50")
+    await asyncio.sleep(DWELL / 2)
+    hass.states.async_set(POWER, "1")
+    await asyncio.sleep(DWELL * 2)
+    assert tv.state == MediaPlayerState.OFF
+    assert hass.states.writes[tv.entity_id] == writes
+
+
+async def test_unavailable_power_entity_switches_off_at_once(hass, make_tv):
+    """An unavailable plug turns the TV off and marks it unavailable without waiting."""
+    tv = await make_tv(power="50", options=OPTIONS)
+    hass.states.async_set(POWER, "unavailable")
+    assert tv.state == MediaPlayerState.OFF
+    assert tv.extra_state_attributes["is_unavailable"]
+
+
+async def test_commanded_change_skips_dwell(hass, make_tv, sent):
+    """A change confirming our own POWER_ON is taken at once, without the dwell."""
+    tv = await make_tv(power="0", options={**OPTIONS, CONF_POWER_DWELL: 10})
+    turn_on = asyncio.create_task(tv.async_turn_on())
+    await asyncio.sleep(0.01)
+    assert [call["command"] for call in sent] == [["POWER_ON"]]
+    hass.states.async_set(POWER, "50")
+    await asyncio.wait_for(turn_on, 1)
+    assert tv.state == MediaPlayerState.ON
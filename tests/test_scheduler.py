@@ -0,0 +1,95 @@
+"""Тесты очереди команд пульта (custom_components/smartify_tv/scheduler.py)."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from custom_components.smartify_tv.scheduler import IRCommandScheduler
+
+pytestmark = pytest.mark.asyncio
+
+PAUSE = 0.05
+# Цикл событий может разбудить таймер чуть раньше срока (на разрешение часов)
+EARLY = 0.001
+
+
+async def test_jobs_run_in_submission_order():
+    """Jobs submitted while the remote is busy run one at a time, first in first out."""
+    scheduler = IRCommandScheduler("remote.test", pause=0)
+    order = []
+    running = 0
+
+    def _job(name):
+        async def _run():
+            nonlocal running
+            running += 1
+            assert running == 1
+            order.append(name)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return name
+
+        return _run
+
+    tasks = []
+    for name in ("a", "b", "c", "d"):
+        tasks.append(asyncio.create_task(scheduler.async_run(_job(name))))
+        # Каждая задача успевает встать в очередь до следующей
+        await asyncio.sleep(0)
+    assert scheduler.queue_depth == 4
+    assert await asyncio.gather(*tasks) == ["a", "b", "c", "d"]
+    assert order == ["a", "b", "c", "d"]
+    assert scheduler.queue_depth == 0
+    assert scheduler.as_dict()["jobs"] == 4
+
+
+async def test_pause_between_transmissions():
+    """The next job starts no earlier than the pause after the previous one ended."""
+    scheduler = IRCommandScheduler("remote.test", pause=PAUSE)
+    spans = []
+
+    async def _job():
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        spans.append((started, time.monotonic()))
+
+    await asyncio.gather(*(scheduler.async_run(_job) for _ in range(3)))
+    for (_, previous_end), (start, _) in zip(spans, spans[1:]):
+        assert start - previous_end >= PAUSE - EARLY
+
+
+async def test_no_pause_when_remote_was_idle():
+    """A job submitted long after the previous one is not delayed."""
+    scheduler = IRCommandScheduler("remote.test", pause=PAUSE)
+
+    async def _job():
+        return time.monotonic()
+
+    await scheduler.async_run(_job)
+    await asyncio.sleep(PAUSE)
+    submitted = time.monotonic()
+    assert await scheduler.async_run(_job) - submitted < PAUSE
+
+
+async def test_failed_job_keeps_pause_and_queue():
+    """A failing job raises to its caller, and the next job still waits for the pause."""
+    scheduler = IRCommandScheduler("remote.test", pause=PAUSE)
+    ended = None
+
+    async def _fail():
+        nonlocal ended
+        ended = time.monotonic()
+        raise RuntimeError("send failed")
+
+    async def _job():
+        return time.monotonic()
+
+    failing = asyncio.create_task(scheduler.async_run(_fail))
+    await asyncio.sleep(0)
+    started = await scheduler.async_run(_job)
+    with pytest.raises(RuntimeError):
+        await failing
+    assert started - ended >= PAUSE - EARLY
+    assert scheduler.queue_depth == 0
@@ -0,0 +1,63 @@
+"""Тесты сборки шагов громкости в одну передачу (SmartifyTVMediaPlayer.async_volume_up/down)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.smartify_tv import media_player
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def _short_window(monkeypatch):
+    """Shorten the coalescing window to keep the tests fast."""
+    monkeypatch.setattr(media_player, "VOLUME_COALESCE_WINDOW", 0.02)
+
+
+async def test_presses_coalesce_into_one_transmission(make_tv, sent):
+    """Presses within the window go out once as the net number of repeats."""
+    tv = await make_tv(power="50")
+    level = tv.volume_level
+    await asyncio.gather(tv.async_volume_up(), tv.async_volume_up(), tv.async_volume_down(), tv.async_volume_up())
+    assert [(call["command"], call["num_repeats"]) for call in sent] == [(["VOLUME_UP"], 2)]
+    assert tv.volume_level > level
+
+
+async def test_opposite_presses_cancel_out(make_tv, sent):
+    """Up and down within the window send nothing."""
+    tv = await make_tv(power="50")
+    await asyncio.gather(tv.async_volume_up(), tv.async_volume_down())
+    assert sent == []
+
+
+async def test_cancelled_batch_is_dropped(make_tv, sent):
+    """Steps of a cancelled batch are not added to the next press; its waiters get an error."""
+    tv = await make_tv(power="50")
+    first = asyncio.create_task(tv.async_volume_up())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(tv.async_volume_up())
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    with pytest.raises(HomeAssistantError):
+        await second
+    await tv.async_volume_down()
+    assert [(call["command"], call["num_repeats"]) for call in sent] == [(["VOLUME_DOWN"], 1)]
+
+
+async def test_send_error_reaches_every_press(hass, make_tv):
+    """A failed transmission is raised to all presses of the batch."""
+    tv = await make_tv(power="50")
+
+    async def _fail(data):
+        raise HomeAssistantError("remote is offline")
+
+    hass.services.async_register("remote", "send_command", _fail)
+    results = await asyncio.gather(tv.async_volume_up(), tv.async_volume_up(), return_exceptions=True)
+    assert len(results) == 2
+    assert all(isinstance(result, HomeAssistantError) for result in results)